@@ -8,6 +8,8 @@
 import argparse
 import sys
 import os
+import stat
+from pathlib import Path
 from typing import List, Tuple
 
 # 添加src目录到路径
@@ -18,6 +20,32 @@ from deduplicator import Deduplicator
 from file_utils import FileHandler
 
 
+def bounded_int(low: int, high: int, message: str):
+    """
+    创建带范围检查的整数参数类型，在 argparse 解析时一次完成验证
+    
+    Args:
+        low (int): 允许的最小值
+        high (int): 允许的最大值
+        message (str): 超出范围时的错误信息
+        
+    Returns:
+        Callable[[str], int]: 供 argparse 的 type 参数使用的转换函数
+    """
+    def convert(value: str) -> int:
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的整数: {value}")
+        
+        if not (low <= number <= high):
+            raise argparse.ArgumentTypeError(message)
+        
+        return number
+    
+    return convert
+
+
 def parse_arguments():
     """
     解析命令行参数
@@ -37,9 +65,11 @@ def parse_arguments():
     )
     
     # 生成模式参数
-    parser.add_argument('-n', '--number', type=int, 
+    parser.add_argument('-n', '--number',
+                       type=bounded_int(1, 10000, "题目数量必须在1-10000之间"),
                        help='生成题目数量 (1-10000)')
-    parser.add_argument('-r', '--range', type=int, 
+    parser.add_argument('-r', '--range',
+                       type=bounded_int(1, 100, "数值范围必须在1-100之间"),
                        help='数值范围上限 (1-100)')
     
     # 批改模式参数
@@ -84,13 +114,7 @@ def validate_arguments(args):
             print("错误: 生成模式必须指定数值范围(-r)")
             sys.exit(1)
         
-        if not (1 <= args.number <= 10000):
-            print("错误: 题目数量必须在1-10000之间")
-            sys.exit(1)
-        
-        if not (1 <= args.range <= 100):
-            print("错误: 数值范围必须在1-100之间")
-            sys.exit(1)
+        # 数值范围已在参数解析时由 bounded_int 检查
     
     # 验证批改模式参数
     if has_grade:
@@ -130,8 +154,7 @@ def generate_problems_mode(number: int, max_range: int):
     exercises_file = "Exercises.txt"
     answers_file = "Answers.txt"
     
-    file_handler.write_exercises(problems, exercises_file)
-    file_handler.write_answers(problems, answers_file)
+    file_handler.write_problems(problems, exercises_file, answers_file)
     
     print(f"题目已生成:")
     print(f"  - 题目文件: {exercises_file}")
@@ -161,12 +184,18 @@ def grade_problems_mode(exercise_file: str, answer_path: str):
         print(f"错误: 读取题目文件失败 - {e}")
         sys.exit(1)
     
-    # 判断是文件还是目录
-    if os.path.isfile(answer_path):
+    # 判断是文件还是目录（只调用一次 stat，后续复用结果）
+    try:
+        answer_mode = os.stat(answer_path).st_mode
+    except OSError:
+        answer_mode = 0
+    is_single_file = stat.S_ISREG(answer_mode)
+    
+    if is_single_file:
         # 单个文件批改
         answer_files = [answer_path]
         print("批改模式: 单个学生答案文件")
-    elif os.path.isdir(answer_path):
+    elif stat.S_ISDIR(answer_mode):
         # 目录批改
         try:
             answer_files = file_handler.find_answer_files(answer_path)
@@ -203,13 +232,14 @@ def grade_problems_mode(exercise_file: str, answer_path: str):
             results = file_handler.grade_exercises(exercises, student_answers)
             
             # 生成批改结果文件名
-            base_name = os.path.splitext(os.path.basename(answer_file))[0]
-            if os.path.isfile(answer_path):
+            answer_file_path = Path(answer_file)
+            grade_name = f"{answer_file_path.stem}_Grade.txt"
+            if is_single_file:
                 # 单个文件模式，在当前目录生成结果
-                grade_file = f"{base_name}_Grade.txt"
+                grade_file = grade_name
             else:
                 # 目录模式，在答案文件同目录生成结果
-                grade_file = os.path.join(os.path.dirname(answer_file), f"{base_name}_Grade.txt")
+                grade_file = str(answer_file_path.parent / grade_name)
             
             # 写入批改结果
             file_handler.write_grade_results(results, grade_file)
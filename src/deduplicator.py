@@ -2,21 +2,40 @@
 去重算法模块
 """
 
+import math
 import sys
 import os
 from typing import List, Tuple, Dict, Any
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
-from expression_parser import ExpressionParser
+from expression_parser import ExpressionParser, _WS_TABLE
+
+# 原始表达式 -> 规范形式哈希 缓存的最大条目数，超出时清空
+_CANONICAL_CACHE_SIZE = 10000
 
 
 class Deduplicator:
     """题目去重器"""
     
-    def __init__(self):
+    def __init__(self, associative: bool = False):
+        """
+        初始化去重器
+
+        Args:
+            associative (bool): 是否同时按结合律去重，默认为False。
+                需求规定只有交换+和×的操作数才算重复（1+2+3 与 3+2+1 不重复），
+                开启后会把连续的+或×展开为多元节点再排序，1+2+3 与 3+2+1 视为重复
+        """
         self.parser = ExpressionParser()
+        self.associative = associative
+        # 已出现题目的规范形式结构键的64位哈希（只保存整数，不保存结构键和规范字符串）；
+        # 生成1万道题时因哈希碰撞误判重复的概率约为 10^-11 量级，误判时该候选被跳过
         self.seen_canonical_forms = set()
+        # 原始表达式（去空白）-> 规范形式结构键的哈希 的缓存，条目数不超过 _CANONICAL_CACHE_SIZE
+        self._canonical_cache = {}
+        # 数字原始文本 -> (叶子结构键, 叶子文本) 的缓存，叶子键字符串经过 sys.intern
+        self._leaf_cache = {}
     
     def canonicalize_expression(self, expression: str) -> str:
         """
@@ -35,123 +54,259 @@ class Deduplicator:
         """
         try:
             # 解析表达式为token
-            tokens = self.parser.tokenize(expression)
-
-            # 构建表达式树
-            tree = self._build_expression_tree(tokens)
-
-            # 规范化表达式树
-            canonical_tree = self._canonicalize_tree(tree)
+            tokens = self.parser.tokenize_raw(expression)
 
-            # 将规范化的树转换回字符串
-            return self._tree_to_string(canonical_tree)
+            # 单遍解析，同时生成规范文本
+            _, text = self._parse_canonical(tokens, with_text=True)
+            return self._render(text)
 
         except Exception:
             # 如果解析失败，返回原始表达式（去除空格）
             return expression.replace(' ', '')
 
-    def _build_expression_tree(self, tokens: List) -> Dict[str, Any]:
+    def canonical_key(self, expression: str) -> tuple:
+        """
+        计算表达式规范形式的结构键，不生成规范字符串
+
+        只交换+和×的操作数得到的表达式结构键相同。结构键是由字符串和元组组成的嵌套元组，
+        比较相等即表示规范形式相同
+
+        Args:
+            expression (str): 原始表达式
+
+        Returns:
+            tuple: 规范形式的结构键
+        """
+        try:
+            tokens = self.parser.tokenize_raw(expression)
+            canonical_key, _ = self._parse_canonical(tokens, with_text=False)
+        except Exception:
+            # 如果解析失败，使用原始表达式（去除空格）作为结构键
+            canonical_key = ('s', expression.replace(' ', ''))
+        return canonical_key
+
+    def _canonical_hash(self, expression: str) -> int:
+        """
+        计算表达式规范形式结构键的哈希，作为去重集合中保存的去重键
+
+        Args:
+            expression (str): 原始表达式
+
+        Returns:
+            int: 规范形式结构键的哈希
+        """
+        # 相同的原始表达式直接命中缓存
+        key = expression.translate(_WS_TABLE)
+        cached = self._canonical_cache.get(key)
+        if cached is not None:
+            return cached
+
+        canonical_hash = hash(self.canonical_key(expression))
+
+        cache = self._canonical_cache
+        if len(cache) >= _CANONICAL_CACHE_SIZE:
+            cache.clear()
+        cache[key] = canonical_hash
+        return canonical_hash
+
+    def _parse_canonical(self, tokens: List, with_text: bool) -> Tuple[tuple, Any]:
         """
-        从token列表构建表达式树
+        用调度场算法解析token列表，单遍完成规范化、结构键计算和（可选的）文本生成
+
+        操作数和运算符分别保存在显式栈中，不使用递归，括号嵌套深度不受递归层数限制。
+        每个节点为 (结构键, 文本)，文本为：
+        - 字符串：叶子为约分后的数字，运算符节点为 "(左运算符右)"
+        - None：with_text 为False时的运算符节点，去重路径不生成任何字符串
+        - 元组 ('a', 运算符, ((结构键, 文本), ...))：开启结合律去重时+和×的多元节点
 
         Args:
             tokens: token列表
+            with_text (bool): 是否生成规范文本
 
         Returns:
-            Dict: 表达式树
-        """
-        # 转换为后缀表达式
-        postfix = self.parser.infix_to_postfix(tokens)
-
-        # 使用栈构建表达式树
-        stack = []
-
-        for token in postfix:
-            if token.type == 'NUMBER':
-                # 叶子节点
-                stack.append({
-                    'type': 'number',
-                    'value': str(token.value)
-                })
-            elif token.type == 'OPERATOR':
-                # 操作符节点
-                if len(stack) < 2:
+            Tuple[tuple, Any]: (结构键, 文本)
+        """
+        precedence = self.parser.precedence
+        leaf_cache = self._leaf_cache
+        operands = []  # (结构键, 文本)
+        operators = []  # 运算符或 '('
+        expect_operand = True  # 下一个token应为数字或左括号
+
+        for kind, value in tokens:
+            if expect_operand:
+                if kind == 'NUMBER':
+                    # 相同数字共享同一个叶子键，避免重复分配字符串和元组
+                    leaf = leaf_cache.get(value)
+                    if leaf is None:
+                        key = sys.intern(self._number_key(value))
+                        leaf = leaf_cache[value] = (('n', key), key)
+                    operands.append(leaf)
+                    expect_operand = False
+                elif value == '(':
+                    operators.append(value)
+                else:
                     raise ValueError("Invalid expression")
 
-                right = stack.pop()
-                left = stack.pop()
+            elif kind == 'OPERATOR':
+                # 左结合：弹出优先级不低于当前运算符的运算符（'(' 的优先级为0，不会被弹出）
+                level = precedence[value]
+                while operators and precedence[operators[-1]] >= level:
+                    self._reduce(operands, operators.pop(), with_text)
+                operators.append(value)
+                expect_operand = True
+
+            elif value == ')':
+                while operators and operators[-1] != '(':
+                    self._reduce(operands, operators.pop(), with_text)
+                if not operators:
+                    raise ValueError("Invalid expression")
+                operators.pop()  # 移除 '('
 
-                stack.append({
-                    'type': 'operator',
-                    'operator': token.value,
-                    'left': left,
-                    'right': right
-                })
+            else:
+                raise ValueError("Invalid expression")
 
-        if len(stack) != 1:
+        if expect_operand:
             raise ValueError("Invalid expression")
 
-        return stack[0]
+        while operators:
+            operator = operators.pop()
+            if operator == '(':
+                raise ValueError("Invalid expression")
+            self._reduce(operands, operator, with_text)
 
-    def _canonicalize_tree(self, tree: Dict[str, Any]) -> Dict[str, Any]:
+        return operands[0]
+
+    def _reduce(self, operands: List, operator: str, with_text: bool):
         """
-        规范化表达式树（仅支持交换律，不完全展开结合律）
+        弹出栈顶的两个操作数，构建运算符节点后压回操作数栈
 
-        根据需求，只有通过有限次交换+和×的操作数才算重复。
-        例如：1+2+3 和 3+2+1 不是重复的，因为它们的树结构不同。
+        Args:
+            operands (List): 操作数栈，元素为 (结构键, 文本)
+            operator (str): 运算符
+            with_text (bool): 是否生成规范文本
+        """
+        right_key, right = operands.pop()
+        left_key, left = operands.pop()
+        operands.append(self._make_node(operator, left_key, left,
+                                        right_key, right, with_text))
+
+    @staticmethod
+    def _number_key(text: str) -> str:
+        """
+        把数字原始文本转换为约分后的键，不构造 Rational
+
+        例如 "6/2" -> "3"，"2/4" -> "1/2"，"9/5" -> "1'4/5"，保证数值相同的叶子得到相同的键；
+        键的格式与 Rational.to_string 一致，规范字符串因此与按 Rational 生成时相同
 
         Args:
-            tree: 表达式树
+            text (str): 数字原始文本，如 "3"、"-3/5"
 
         Returns:
-            Dict: 规范化后的表达式树
+            str: 约分后的数字键
+        """
+        if '/' not in text:
+            return str(int(text))
+
+        numerator, denominator = text.split('/')
+        numerator = int(numerator)
+        denominator = int(denominator)
+        if denominator == 0:
+            raise ValueError("分母不能为0")
+
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+
+        gcd_val = math.gcd(numerator, denominator)
+        numerator //= gcd_val
+        denominator //= gcd_val
+
+        if denominator == 1:
+            return str(numerator)
+
+        # 假分数输出为带分数，整数部分和分数部分同号
+        sign = '-' if numerator < 0 else ''
+        whole_part, remainder = divmod(abs(numerator), denominator)
+        if whole_part == 0:
+            return f"{sign}{remainder}/{denominator}"
+        return f"{sign}{whole_part}'{remainder}/{denominator}"
+
+    def _make_node(self, operator: str, left_key: tuple, left: Any,
+                   right_key: tuple, right: Any, with_text: bool) -> Tuple[tuple, Any]:
         """
-        if tree['type'] == 'number':
-            return tree
+        构建规范化的运算符节点（仅支持交换律，不完全展开结合律）
 
-        # 递归规范化左右子树
-        left = self._canonicalize_tree(tree['left'])
-        right = self._canonicalize_tree(tree['right'])
+        根据需求，只有通过有限次交换+和×的操作数才算重复。
+        例如：1+2+3 和 3+2+1 不是重复的，因为它们的树结构不同。
 
-        operator = tree['operator']
+        生成文本时交换律运算符的左右操作数按文本字典序排序，与规范字符串一致；
+        不生成文本时按结构键排序，避免生成子树字符串。结构键由字符串和元组组成，
+        比较结果与进程的哈希随机化（PYTHONHASHSEED）无关。
+        开启结合律去重时，同一运算符的子节点会被展开合并为多元节点。
 
-        # 对于交换律运算符（+ 和 *），按字典序排序左右操作数
-        if operator in ['+', '*']:
-            left_str = self._tree_to_string(left)
-            right_str = self._tree_to_string(right)
+        Args:
+            operator (str): 运算符
+            left_key (tuple): 左子树结构键
+            left: 左子树文本
+            right_key (tuple): 右子树结构键
+            right: 右子树文本
+            with_text (bool): 是否生成规范文本
 
-            # 如果右边的字符串字典序小于左边，交换它们
-            if right_str < left_str:
+        Returns:
+            Tuple[tuple, Any]: (结构键, 文本)
+        """
+        if self.associative and operator in ('+', '*'):
+            # 展开同一运算符的多元子节点，所有操作数统一排序
+            operands = []
+            for child_key, child in ((left_key, left), (right_key, right)):
+                if isinstance(child, tuple) and child[1] == operator:
+                    operands.extend(child[2])
+                else:
+                    operands.append((child_key, self._render(child) if with_text else None))
+
+            # 生成文本时按文本排序，文本相同时再比较结构键；不生成文本时只按结构键排序
+            if with_text:
+                operands.sort(key=lambda operand: (operand[1], operand[0]))
+            else:
+                operands.sort(key=lambda operand: operand[0])
+
+            node_key = ('a', operator, tuple(key for key, _ in operands))
+            return node_key, ('a', operator, tuple(operands))
+
+        # 对于交换律运算符（+ 和 *），生成文本时按文本字典序排序左右操作数，否则按结构键排序
+        if operator in ('+', '*'):
+            if with_text:
+                swap = self._render(right) < self._render(left)
+            else:
+                swap = right_key < left_key
+            if swap:
                 left, right = right, left
+                left_key, right_key = right_key, left_key
 
-        return {
-            'type': 'operator',
-            'operator': operator,
-            'left': left,
-            'right': right
-        }
+        node_key = ('o', operator, left_key, right_key)
+
+        if not with_text:
+            return node_key, None
 
-    def _tree_to_string(self, tree: Dict[str, Any]) -> str:
+        # 添加括号以保持优先级
+        return node_key, f"({self._render(left)}{operator}{self._render(right)})"
+
+    @staticmethod
+    def _render(text: Any) -> str:
         """
-        将表达式树转换为字符串
+        将节点文本转换为字符串，多元节点输出为 (a+b+c)
 
         Args:
-            tree: 表达式树
+            text: 节点文本（字符串或多元节点元组）
 
         Returns:
             str: 表达式字符串
         """
-        if tree['type'] == 'number':
-            return tree['value']
-
-        left_str = self._tree_to_string(tree['left'])
-        right_str = self._tree_to_string(tree['right'])
-        operator = tree['operator']
-
-        # 添加括号以保持优先级
-        return f"({left_str}{operator}{right_str})"
+        if isinstance(text, tuple):
+            _, operator, operands = text
+            return "(" + operator.join(operand for _, operand in operands) + ")"
+        return text
     
-    def is_duplicate(self, expression: str) -> bool:
+    def is_duplicate(self, expression: str, record: bool = True) -> bool:
         """
         检查表达式是否重复（通过规范化形式）
 
@@ -159,16 +314,19 @@ class Deduplicator:
 
         Args:
             expression (str): 表达式字符串
+            record (bool): 不重复时是否记录该表达式，默认为True；
+                为False时只查询，不改变去重器状态
 
         Returns:
             bool: 是否重复
         """
-        canonical = self.canonicalize_expression(expression)
+        canonical_hash = self._canonical_hash(expression)
 
-        if canonical in self.seen_canonical_forms:
+        if canonical_hash in self.seen_canonical_forms:
             return True
 
-        self.seen_canonical_forms.add(canonical)
+        if record:
+            self.seen_canonical_forms.add(canonical_hash)
         return False
     
     def deduplicate_problems(self, problems: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
@@ -181,17 +339,17 @@ class Deduplicator:
         Returns:
             List[Tuple[str, str]]: 去重后的题目列表
         """
-        unique_problems = []
-        
-        for expression, answer in problems:
-            if not self.is_duplicate(expression):
-                unique_problems.append((expression, answer))
+        # 先一次性计算所有规范哈希，再单遍筛选（seen.add 返回None，首次出现的题目被保留）
+        hashes = [self._canonical_hash(expression) for expression, _ in problems]
+        seen = self.seen_canonical_forms
         
-        return unique_problems
+        return [problem for problem, canonical_hash in zip(problems, hashes)
+                if not (canonical_hash in seen or seen.add(canonical_hash))]
     
     def reset(self):
         """重置去重器状态"""
         self.seen_canonical_forms.clear()
+        self._canonical_cache.clear()
     
     def get_statistics(self) -> Dict[str, int]:
         """
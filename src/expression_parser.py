@@ -4,22 +4,29 @@
 支持四则运算和括号优先级的数学表达式解析和求值
 """
 
-import re
+import array
 import sys
 import os
-from typing import List, Union, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union, Tuple
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 from rational import Rational
 
+# 空白字符删除表（str.translate 在C层逐字符删除，比正则替换更快）
+_WS_TABLE = str.maketrans('', '', ' \t\n\r\f\v')
 
-class Token:
-    """词法单元类"""
+
+class Token(NamedTuple):
+    """
+    词法单元类
     
-    def __init__(self, type_: str, value: Union[str, Rational]):
-        self.type = type_
-        self.value = value
+    解析器内部直接产生和处理 (类型, 值) 普通元组，不经过 Token 的构造函数；
+    Token 与同内容的普通元组相等，供外部调用方按字段名构造和读取词法单元
+    """
+    
+    type: str
+    value: Union[str, Rational]
     
     def __repr__(self):
         return f"Token({self.type}, {self.value})"
@@ -38,6 +45,11 @@ class ExpressionParser:
             '(': 0,
             ')': 0
         }
+        
+        # 按 ord(字符) 索引的优先级查找表，避免在转换循环中做字典查找
+        self._precedence_table = array.array('b', [0] * 128)
+        for char, level in self.precedence.items():
+            self._precedence_table[ord(char)] = level
     
     def tokenize(self, expression: str) -> List[Token]:
         """
@@ -49,152 +61,155 @@ class ExpressionParser:
         Returns:
             List[Token]: 词法单元列表
         """
+        return list(self._iter_tokens(expression, raw=False))
+    
+    def tokenize_raw(self, expression: str) -> List[Token]:
+        """
+        词法分析（快速路径）：数字保留为原始文本，不构造 Rational
+        
+        供去重规范化使用，该场景只需要数字的文本形式，无需约分计算
+        
+        Args:
+            expression (str): 数学表达式字符串
+            
+        Returns:
+            List[Token]: 词法单元列表，NUMBER 的值为字符串（如 "-3/5"）
+        """
+        return list(self._iter_tokens(expression, raw=True))
+    
+    def tokenize_to_postfix(self, expression: str) -> List[Token]:
+        """
+        词法分析与中缀转后缀合并为一遍：扫描出的词法单元直接流入调度场算法，
+        不生成中间的词法单元列表
+        
+        Args:
+            expression (str): 数学表达式字符串
+            
+        Returns:
+            List[Token]: 后缀表达式的词法单元列表
+        """
+        return self.infix_to_postfix(self._iter_tokens(expression, raw=False))
+    
+    def _iter_tokens(self, expression: str, raw: bool) -> Iterator[Token]:
+        """
+        词法扫描的公共实现，逐个产生词法单元
+        
+        Args:
+            expression (str): 数学表达式字符串
+            raw (bool): 为True时数字保留为原始文本
+            
+        Yields:
+            Token: 词法单元
+        """
         # 移除所有空白字符
-        expression = re.sub(r'\s+', '', expression)
+        expression = expression.translate(_WS_TABLE)
         
-        tokens = []
+        length = len(expression)
         i = 0
+        unary = True  # 处于一元位置：开头、运算符或左括号之后
+        negative = False  # 上一个字符是否为一元负号
         
-        while i < len(expression):
+        while i < length:
             char = expression[i]
             
             # 处理数字（包括分数）
-            if char.isdigit():
-                # 收集数字部分
-                number_str = ''
-                
-                # 收集整数部分
-                while i < len(expression) and expression[i].isdigit():
-                    number_str += expression[i]
+            if char.isdecimal():
+                start = i
+                i += 1
+                while i < length and expression[i].isdecimal():
                     i += 1
                 
                 # 检查是否有分数部分
-                if i < len(expression) and expression[i] == '/':
-                    number_str += '/'
+                split = 0
+                if i < length and expression[i] == '/':
                     i += 1
-                    
-                    # 收集分母
-                    while i < len(expression) and expression[i].isdigit():
-                        number_str += expression[i]
+                    split = i
+                    while i < length and expression[i].isdecimal():
                         i += 1
                 
-                # 创建有理数
-                try:
-                    if '/' in number_str:
-                        parts = number_str.split('/')
-                        if len(parts) != 2 or not parts[0] or not parts[1]:
-                            raise ValueError("无效的分数格式")
-                        numerator = int(parts[0])
-                        denominator = int(parts[1])
-                        rational = Rational(numerator, denominator)
-                    else:
-                        rational = Rational(int(number_str))
-                    
-                    tokens.append(Token('NUMBER', rational))
-                except ValueError as e:
-                    raise ValueError(f"无效的数字格式: {number_str}") from e
-            
-            # 处理负号（可能是负数或减法运算符）
-            elif char == '-':
-                # 检查是否为负数（前面是运算符、括号或开头）
-                is_negative = (i == 0 or expression[i-1] in '+-*/(')
+                text = expression[start:i]
+                number_str = '-' + text if negative else text
                 
-                if is_negative:
-                    i += 1
-                    if i >= len(expression) or not expression[i].isdigit():
-                        # 如果负号后面没有数字，则作为运算符处理
-                        tokens.append(Token('OPERATOR', '-'))
-                        continue
-                    
-                    # 收集负数部分
-                    number_str = '-'
-                    
-                    # 收集整数部分
-                    while i < len(expression) and expression[i].isdigit():
-                        number_str += expression[i]
-                        i += 1
-                    
-                    # 检查是否有分数部分
-                    if i < len(expression) and expression[i] == '/':
-                        number_str += '/'
-                        i += 1
-                        
-                        # 收集分母
-                        while i < len(expression) and expression[i].isdigit():
-                            number_str += expression[i]
-                            i += 1
-                    
-                    # 创建有理数
+                if split == i:
+                    # 分数线后没有分母
+                    raise ValueError(f"无效的数字格式: {number_str}")
+                
+                if raw:
+                    value = number_str
+                else:
                     try:
-                        if '/' in number_str:
-                            parts = number_str.split('/')
-                            if len(parts) != 2 or not parts[0] or not parts[1]:
-                                raise ValueError("无效的分数格式")
-                            numerator = int(parts[0])
-                            denominator = int(parts[1])
-                            rational = Rational(numerator, denominator)
+                        if split:
+                            numerator, denominator = number_str.split('/')
+                            value = Rational(int(numerator), int(denominator))
                         else:
-                            rational = Rational(int(number_str))
-                        
-                        tokens.append(Token('NUMBER', rational))
+                            value = Rational(int(number_str))
                     except ValueError as e:
                         raise ValueError(f"无效的数字格式: {number_str}") from e
-                else:
-                    # 作为减法运算符处理
-                    tokens.append(Token('OPERATOR', '-'))
-                    i += 1
+                
+                negative = False
+                unary = False
+                yield ('NUMBER', value)
             
-            # 处理其他运算符
-            elif char in '+*/':
-                # 检查是否为无效的分数格式（以/开头）
-                if char == '/' and (i == 0 or expression[i-1] in '+-*/('):
-                    raise ValueError("无效的分数格式：不能以/开头")
-                tokens.append(Token('OPERATOR', char))
+            # 处理运算符
+            elif char in '+-*/':
                 i += 1
+                if unary:
+                    if char == '-':
+                        # 负号后面紧跟数字时作为负数处理，否则作为运算符
+                        if i < length and expression[i].isdecimal():
+                            negative = True
+                            continue
+                    elif char == '/':
+                        # 检查是否为无效的分数格式（以/开头）
+                        raise ValueError("无效的分数格式：不能以/开头")
+                
+                unary = True
+                yield ('OPERATOR', char)
             
             # 处理括号
-            elif char in '()':
-                tokens.append(Token('PARENTHESIS', char))
+            elif char == '(' or char == ')':
                 i += 1
+                unary = char == '('
+                yield ('PARENTHESIS', char)
             
             else:
                 raise ValueError(f"无效的字符: {char}")
-        
-        return tokens
     
-    def infix_to_postfix(self, tokens: List[Token]) -> List[Token]:
+    def infix_to_postfix(self, tokens: Iterable[Token]) -> List[Token]:
         """
         中缀表达式转后缀表达式（逆波兰表示法）
         
         Args:
-            tokens (List[Token]): 中缀表达式的词法单元列表
+            tokens (Iterable[Token]): 中缀表达式的词法单元序列（列表或逐个产生的迭代器）
             
         Returns:
             List[Token]: 后缀表达式的词法单元列表
         """
         output = []
         operator_stack = []
+        precedence = self._precedence_table
         
         for token in tokens:
-            if token.type == 'NUMBER':
+            kind, value = token
+            
+            if kind == 'NUMBER':
                 output.append(token)
             
-            elif token.type == 'OPERATOR':
-                # 处理运算符优先级
-                while (operator_stack and 
-                       operator_stack[-1].type == 'OPERATOR' and
-                       self.precedence[operator_stack[-1].value] >= 
-                       self.precedence[token.value]):
+            elif kind == 'OPERATOR':
+                # 处理运算符优先级（左括号的优先级为0，不会被弹出）
+                level = precedence[ord(value)]
+                while (operator_stack and
+                       precedence[ord(operator_stack[-1][1])] >= level):
                     output.append(operator_stack.pop())
                 operator_stack.append(token)
             
-            elif token.type == 'PARENTHESIS' and token.value == '(':
+            elif kind == 'PARENTHESIS' and value == '(':
                 operator_stack.append(token)
             
-            elif token.type == 'PARENTHESIS' and token.value == ')':
+            elif kind == 'PARENTHESIS' and value == ')':
                 # 处理括号内的运算符
-                while (operator_stack and 
-                       operator_stack[-1].value != '('):
+                while (operator_stack and
+                       operator_stack[-1][1] != '('):
                     output.append(operator_stack.pop())
                 
                 if not operator_stack:
@@ -203,7 +218,7 @@ class ExpressionParser:
         
         # 处理剩余的运算符
         while operator_stack:
-            if operator_stack[-1].value in '()':
+            if operator_stack[-1][1] in '()':
                 raise ValueError("括号不匹配")
             output.append(operator_stack.pop())
         
@@ -218,32 +233,51 @@ class ExpressionParser:
             
         Returns:
             Rational: 计算结果
+            
+        Raises:
+            ZeroDivisionError: 除数为0时抛出异常
+        """
+        result = self._evaluate_postfix(tokens)
+        if result is None:
+            raise ZeroDivisionError("除数不能为零")
+        return result
+    
+    def _evaluate_postfix(self, tokens: List[Token]) -> Optional[Rational]:
+        """
+        计算后缀表达式，遇到除数为0时返回 None 而不抛出异常
+        
+        Args:
+            tokens (List[Token]): 后缀表达式的词法单元列表
+            
+        Returns:
+            Optional[Rational]: 计算结果，出现除零时为 None
         """
         stack = []
         
-        for token in tokens:
-            if token.type == 'NUMBER':
-                stack.append(token.value)
+        for kind, value in tokens:
+            if kind == 'NUMBER':
+                stack.append(value)
             
-            elif token.type == 'OPERATOR':
+            elif kind == 'OPERATOR':
                 if len(stack) < 2:
                     raise ValueError("表达式格式错误：运算符缺少操作数")
                 
                 right = stack.pop()
                 left = stack.pop()
                 
-                if token.value == '+':
-                    result = left + right
-                elif token.value == '-':
-                    result = left - right
-                elif token.value == '*':
-                    result = left * right
-                elif token.value == '/':
-                    if right.is_zero():
-                        raise ZeroDivisionError("除数不能为零")
-                    result = left / right
+                # 操作数都是词法分析产生的 Rational，直接调用内部运算方法，跳过类型检查
+                if value == '+':
+                    result = left._add_rat(right)
+                elif value == '-':
+                    result = left._sub_rat(right)
+                elif value == '*':
+                    result = left._mul_rat(right)
+                elif value == '/':
+                    result = left.try_div(right)
+                    if result is None:
+                        return None
                 else:
-                    raise ValueError(f"未知的运算符: {token.value}")
+                    raise ValueError(f"未知的运算符: {value}")
                 
                 stack.append(result)
         
@@ -262,23 +296,37 @@ class ExpressionParser:
         Returns:
             Rational: 计算结果
         """
+        result = self.try_parse(expression)
+        if result is None:
+            error = ZeroDivisionError("除数不能为零")
+            raise ValueError(f"表达式解析错误: {error}") from error
+        return result
+    
+    def try_parse(self, expression: str) -> Optional[Rational]:
+        """
+        解析并计算数学表达式，除数为0时返回 None
+        
+        与 parse 相同，但除零不作为异常处理，供频繁遇到除零的调用方
+        （如题目验证）使用；表达式格式错误时仍抛出 ValueError
+        
+        Args:
+            expression (str): 数学表达式字符串
+            
+        Returns:
+            Optional[Rational]: 计算结果，出现除零时为 None
+        """
         if not expression.strip():
             raise ValueError("表达式不能为空")
         
         try:
-            # 词法分析
-            tokens = self.tokenize(expression)
+            # 词法分析并转换为后缀表达式（单遍完成）
+            postfix_tokens = self.tokenize_to_postfix(expression)
             
-            if not tokens:
+            if not postfix_tokens:
                 raise ValueError("表达式为空")
             
-            # 转换为后缀表达式
-            postfix_tokens = self.infix_to_postfix(tokens)
-            
             # 计算后缀表达式
-            result = self.evaluate_postfix(postfix_tokens)
-            
-            return result
+            return self._evaluate_postfix(postfix_tokens)
             
         except Exception as e:
             raise ValueError(f"表达式解析错误: {e}") from e
@@ -4,22 +4,60 @@
 处理题目文件、答案文件和批改结果的读写
 """
 
+import functools
 import os
-import re
 import sys
-from typing import List, Tuple, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 from expression_parser import ExpressionParser
 from rational import Rational
 
+# 文件读写缓冲区大小（1 MiB），减少大文件逐行读取时的 read 系统调用次数；
+# 保留默认的换行转换（newline=None），以兼容 \r\n 与 \r 换行的文件
+_IO_BUFFER_SIZE = 1 << 20
+
+# 待计算正确答案的题目数量达到该值时才使用多进程；题目过少时进程池的启动
+# 与序列化开销会超过并行收益（该阈值为经验估计值，未经多核机器实测）
+_PARALLEL_GRADE_THRESHOLD = 2000
+
+# 题目 -> 正确答案字符串 缓存的最大条目数，超出时清空
+_CORRECT_ANSWER_CACHE_SIZE = 100000
+
+
+def _solve_chunk(exercises: List[str]) -> List[Optional[str]]:
+    """
+    在子进程中计算一段题目的正确答案（模块级函数，便于进程池序列化）
+    
+    Args:
+        exercises (List[str]): 题目表达式列表
+        
+    Returns:
+        List[Optional[str]]: 正确答案字符串列表，解析失败的题目为None，
+            由主进程批改时生成错误信息
+    """
+    parser = ExpressionParser()
+    correct_answers = []
+    for exercise in exercises:
+        try:
+            correct_answers.append(parser.parse(exercise).to_string())
+        except Exception:
+            correct_answers.append(None)
+    return correct_answers
+
 
 class FileHandler:
     """文件处理器"""
     
     def __init__(self):
         self.parser = ExpressionParser()
+        
+        # 题目 -> 正确答案字符串，跨多次批改保留：批改多个学生的答案时
+        # 题目相同，每道题只需解析计算一次
+        self._correct_answers = {}
     
     def write_exercises(self, problems: List[Tuple[str, str]], filename: str):
         """
@@ -30,9 +68,11 @@ class FileHandler:
             filename (str): 文件名
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for i, (expression, _) in enumerate(problems, 1):
-                    f.write(f"{i}. {expression} =\n")
+            # 先拼接成一个缓冲区再一次性写入，避免逐题调用 f.write
+            content = "".join(f"{i}. {expression} =\n"
+                              for i, (expression, _) in enumerate(problems, 1))
+            with open(filename, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(content)
             print(f"题目文件已写入: {filename}")
         except Exception as e:
             raise Exception(f"写入题目文件失败: {e}")
@@ -46,13 +86,28 @@ class FileHandler:
             filename (str): 文件名
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for i, (_, answer) in enumerate(problems, 1):
-                    f.write(f"{i}. {answer}\n")
+            # 先拼接成一个缓冲区再一次性写入
+            content = "".join(f"{i}. {answer}\n"
+                              for i, (_, answer) in enumerate(problems, 1))
+            with open(filename, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(content)
             print(f"答案文件已写入: {filename}")
         except Exception as e:
             raise Exception(f"写入答案文件失败: {e}")
     
+    def write_problems(self, problems: List[Tuple[str, str]],
+                       exercise_file: str, answer_file: str):
+        """
+        同时写入题目文件和答案文件
+        
+        Args:
+            problems (List[Tuple[str, str]]): 题目列表，每个元素为(表达式, 答案)
+            exercise_file (str): 题目文件名
+            answer_file (str): 答案文件名
+        """
+        self.write_exercises(problems, exercise_file)
+        self.write_answers(problems, answer_file)
+    
     def read_exercises(self, filename: str) -> List[str]:
         """
         读取题目文件
@@ -63,23 +118,53 @@ class FileHandler:
         Returns:
             List[str]: 题目表达式列表
         """
-        exercises = []
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        # 解析题目格式: "1. 1 + 2 = ?" 或 "1. 1 + 2 ="
-                        match = re.match(r'^\d+\.\s*(.+)\s*=\s*\??$', line)
-                        if match:
-                            expression = match.group(1).strip()
-                            exercises.append(expression)
-                        else:
-                            print(f"警告: 跳过无效题目格式: {line}")
+            with open(filename, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                # 一次读入整个文件再切分；文本模式已把换行统一为 \n，
+                # 按 \n 切分与逐行迭代结果一致（splitlines 还会在 \f 等字符处切分）
+                lines = f.read().split('\n')
+            
+            return list(self._parse_exercise_lines(lines))
+        except Exception as e:
+            raise Exception(f"读取题目文件失败: {e}") from e
+    
+    def iter_exercises(self, filename: str) -> Iterator[str]:
+        """
+        逐行读取题目文件并逐个产生题目表达式，不生成中间列表
+        
+        调用方可以在读取过程中随时停止（如遇到第一道无效题目）
+        
+        Args:
+            filename (str): 题目文件名
+            
+        Yields:
+            str: 题目表达式
+        """
+        try:
+            with open(filename, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                yield from self._parse_exercise_lines(f)
         except Exception as e:
-            raise Exception(f"读取题目文件失败: {e}")
+            raise Exception(f"读取题目文件失败: {e}") from e
+    
+    def _parse_exercise_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        从题目行中解析出表达式，跳过空行，无效行输出警告
         
-        return exercises
+        Args:
+            lines (Iterable[str]): 题目行
+            
+        Yields:
+            str: 题目表达式
+        """
+        for line in lines:
+            line = line.strip()
+            if line:
+                # 解析题目格式: "1. 1 + 2 = ?" 或 "1. 1 + 2 ="
+                expression = self._parse_exercise_line(line)
+                if expression is not None:
+                    yield expression
+                else:
+                    print(f"警告: 跳过无效题目格式: {line}")
     
     def read_answers(self, filename: str) -> List[str]:
         """
@@ -93,22 +178,69 @@ class FileHandler:
         """
         answers = []
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        # 解析答案格式: "1. 3"
-                        match = re.match(r'^\d+\.\s*(.+)$', line)
-                        if match:
-                            answer = match.group(1).strip()
-                            answers.append(answer)
-                        else:
-                            print(f"警告: 跳过无效答案格式: {line}")
+            with open(filename, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                # 一次读入整个文件再切分
+                lines = f.read().split('\n')
+            
+            for line in lines:
+                line = line.strip()
+                if line:
+                    # 解析答案格式: "1. 3"
+                    answer = self._parse_answer_line(line)
+                    if answer is not None:
+                        answers.append(answer)
+                    else:
+                        print(f"警告: 跳过无效答案格式: {line}")
         except Exception as e:
-            raise Exception(f"读取答案文件失败: {e}")
+            raise Exception(f"读取答案文件失败: {e}") from e
         
         return answers
     
+    @staticmethod
+    def _parse_exercise_line(line: str) -> Optional[str]:
+        """
+        解析一行题目，格式为 "编号. 表达式 =" 或 "编号. 表达式 = ?"
+        
+        用 str.partition 拆分编号前缀，代替正则匹配
+        
+        Args:
+            line (str): 去除首尾空白后的题目行
+            
+        Returns:
+            Optional[str]: 表达式，格式无效时返回None
+        """
+        number, dot, rest = line.partition('.')
+        if not dot or not number.isdecimal():
+            return None
+        
+        # 去掉末尾的 "?" 和 "="
+        if rest.endswith('?'):
+            rest = rest[:-1]
+        rest = rest.rstrip()
+        if not rest.endswith('='):
+            return None
+        
+        expression = rest[:-1].strip()
+        return expression or None
+    
+    @staticmethod
+    def _parse_answer_line(line: str) -> Optional[str]:
+        """
+        解析一行答案，格式为 "编号. 答案"
+        
+        Args:
+            line (str): 去除首尾空白后的答案行
+            
+        Returns:
+            Optional[str]: 答案，格式无效时返回None
+        """
+        number, dot, rest = line.partition('.')
+        if not dot or not number.isdecimal():
+            return None
+        
+        answer = rest.strip()
+        return answer or None
+    
     def grade_exercises(self, exercises: List[str], answers: List[str]) -> List[Tuple[bool, str]]:
         """
         批改题目
@@ -120,13 +252,67 @@ class FileHandler:
         Returns:
             List[Tuple[bool, str]]: 批改结果列表，每个元素为(是否正确, 错误信息)
         """
+        pairs = list(zip(exercises, answers))
+        
+        # 只有尚未缓存正确答案的题目需要解析计算（去重并保持顺序）
+        correct_answers = self._correct_answers
+        misses = list(dict.fromkeys(exercise for exercise, _ in pairs
+                                    if exercise not in correct_answers))
+        workers = os.cpu_count() or 1
+        
+        # 待计算的题目较多且有多个CPU时，按CPU数切分为连续的段，
+        # 在子进程中计算正确答案并合并到缓存，再在当前进程中统一批改
+        if workers > 1 and len(misses) >= _PARALLEL_GRADE_THRESHOLD:
+            chunk_size = -(-len(misses) // workers)
+            chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                    solved = [correct_answer
+                              for chunk_answers in executor.map(_solve_chunk, chunks)
+                              for correct_answer in chunk_answers]
+            except (OSError, BrokenProcessPool):
+                # 无法创建子进程时退回单进程计算
+                pass
+            else:
+                for exercise, correct_answer in zip(misses, solved):
+                    if correct_answer is not None:
+                        self._remember_correct_answer(exercise, correct_answer)
+        
+        return self._grade_pairs(pairs)
+    
+    def _remember_correct_answer(self, exercise: str, correct_answer: str):
+        """
+        缓存题目的正确答案，缓存已满时先清空
+        
+        Args:
+            exercise (str): 题目表达式
+            correct_answer (str): 正确答案字符串
+        """
+        correct_answers = self._correct_answers
+        if len(correct_answers) >= _CORRECT_ANSWER_CACHE_SIZE:
+            correct_answers.clear()
+        correct_answers[exercise] = correct_answer
+    
+    def _grade_pairs(self, pairs: List[Tuple[str, str]]) -> List[Tuple[bool, str]]:
+        """
+        在当前进程中逐题批改
+        
+        Args:
+            pairs (List[Tuple[str, str]]): (题目, 答案) 列表
+            
+        Returns:
+            List[Tuple[bool, str]]: 批改结果列表
+        """
         results = []
+        correct_answers = self._correct_answers
         
-        for i, (exercise, answer) in enumerate(zip(exercises, answers)):
+        for exercise, answer in pairs:
             try:
-                # 计算正确答案
-                correct_answer = self.parser.parse(exercise)
-                correct_answer_str = correct_answer.to_string()
+                # 计算正确答案（相同题目只解析一次）
+                correct_answer_str = correct_answers.get(exercise)
+                if correct_answer_str is None:
+                    correct_answer_str = self.parser.parse(exercise).to_string()
+                    self._remember_correct_answer(exercise, correct_answer_str)
                 
                 # 比较答案
                 is_correct = self._compare_answers(correct_answer_str, answer)
@@ -160,10 +346,14 @@ class FileHandler:
         
         return correct_normalized == student_normalized
     
-    def _normalize_answer(self, answer: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _normalize_answer(answer: str) -> str:
         """
         标准化答案格式
         
+        结果按答案字符串缓存，重复出现的答案不再重新解析
+        
         Args:
             answer (str): 原始答案
             
@@ -173,6 +363,11 @@ class FileHandler:
         # 移除空格
         normalized = answer.replace(' ', '')
         
+        # 快速路径：纯整数（可带负号）直接转换，不进入分数解析和异常处理
+        digits = normalized[1:] if normalized.startswith('-') else normalized
+        if digits.isdecimal():
+            return str(int(normalized))
+        
         # 统一分数格式
         # 将带分数转换为假分数进行比较
         try:
@@ -201,28 +396,33 @@ class FileHandler:
             filename (str): 文件名
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                # 统计信息
-                correct_count = sum(1 for is_correct, _ in results if is_correct)
-                total_count = len(results)
-                wrong_count = total_count - correct_count
-                
-                # 收集正确和错误的题目编号
-                correct_numbers = [i for i, (is_correct, _) in enumerate(results, 1) if is_correct]
-                wrong_numbers = [i for i, (is_correct, _) in enumerate(results, 1) if not is_correct]
-                
-                # 按照要求格式写入
-                if correct_numbers:
-                    correct_str = ", ".join(map(str, correct_numbers))
-                    f.write(f"Correct: {correct_count} ({correct_str})\n")
-                else:
-                    f.write(f"Correct: {correct_count}\n")
-                
-                if wrong_numbers:
-                    wrong_str = ", ".join(map(str, wrong_numbers))
-                    f.write(f"Wrong: {wrong_count} ({wrong_str})\n")
-                else:
-                    f.write(f"Wrong: {wrong_count}\n")
+            # 单遍收集正确和错误的题目编号（绑定局部 append，省去每次的属性查找）
+            correct_numbers = []
+            wrong_numbers = []
+            append_correct = correct_numbers.append
+            append_wrong = wrong_numbers.append
+            for i, (is_correct, _) in enumerate(results, 1):
+                (append_correct if is_correct else append_wrong)(i)
+            
+            # 统计信息
+            correct_count = len(correct_numbers)
+            wrong_count = len(wrong_numbers)
+            
+            # 按照要求格式写入
+            if correct_numbers:
+                correct_str = ", ".join(map(str, correct_numbers))
+                correct_line = f"Correct: {correct_count} ({correct_str})\n"
+            else:
+                correct_line = f"Correct: {correct_count}\n"
+            
+            if wrong_numbers:
+                wrong_str = ", ".join(map(str, wrong_numbers))
+                wrong_line = f"Wrong: {wrong_count} ({wrong_str})\n"
+            else:
+                wrong_line = f"Wrong: {wrong_count}\n"
+            
+            with open(filename, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(correct_line + wrong_line)
             
             print(f"批改结果文件已写入: {filename}")
         except Exception as e:
@@ -261,19 +461,38 @@ class FileHandler:
         Returns:
             List[str]: 答案文件路径列表
         """
-        answer_files = []
+        return sorted(self._iter_answer_files(directory))
+    
+    def _iter_answer_files(self, directory: str) -> Iterator[str]:
+        """
+        用 os.scandir 递归查找答案文件，只依赖目录项自带的类型信息，不逐个 stat
         
-        # 递归遍历目录
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                # 检查文件扩展名
-                if file.endswith('.txt'):
-                    file_path = os.path.join(root, file)
-                    # 跳过批改结果文件
-                    if not file.endswith('_Grade.txt') and not file.endswith('Grade.txt'):
-                        answer_files.append(file_path)
+        与 os.walk 一致：不进入指向目录的符号链接，无法读取的目录直接跳过
         
-        return sorted(answer_files)
+        Args:
+            directory (str): 目录路径
+            
+        Yields:
+            str: 答案文件路径
+        """
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            return
+        
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if is_dir:
+                    if not entry.is_symlink():
+                        yield from self._iter_answer_files(entry.path)
+                # 只要 .txt 文件，并跳过批改结果文件（*Grade.txt）
+                elif entry.name.endswith('.txt') and not entry.name.endswith('Grade.txt'):
+                    yield entry.path
     
     def get_file_stats(self, filename: str) -> Dict[str, Any]:
         """
@@ -286,13 +505,19 @@ class FileHandler:
             Dict[str, Any]: 统计信息
         """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            with open(filename, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+                lines = f.read().split('\n')
+                # 对已打开的文件描述符取大小，不再按路径重新 stat
+                file_size = os.fstat(f.fileno()).st_size
+            
+            # 以换行结尾时最后会多出一个空串，与 readlines 的行数保持一致
+            if not lines[-1]:
+                lines.pop()
             
             return {
                 "total_lines": len(lines),
-                "non_empty_lines": len([line for line in lines if line.strip()]),
-                "file_size": os.path.getsize(filename)
+                "non_empty_lines": sum(1 for line in lines if line.strip()),
+                "file_size": file_size
             }
         except Exception:
             return {
@@ -318,23 +543,23 @@ class FileValidator:
         Returns:
             Tuple[bool, str]: (是否有效, 错误信息)
         """
-        if not os.path.exists(filename):
-            return False, f"文件不存在: {filename}"
-        
+        # 直接尝试打开文件，不预先检查是否存在（省一次 stat，也避免检查与打开之间的竞态）
         try:
-            exercises = self.file_handler.read_exercises(filename)
-            if not exercises:
-                return False, "文件为空或格式错误"
-            
-            # 验证每个题目是否可以解析
-            for i, exercise in enumerate(exercises, 1):
+            # 边读边验证每个题目是否可以解析，遇到第一道无效题目即返回
+            count = 0
+            for count, exercise in enumerate(self.file_handler.iter_exercises(filename), 1):
                 try:
                     self.file_handler.parser.parse(exercise)
                 except Exception as e:
-                    return False, f"第{i}题解析失败: {e}"
+                    return False, f"第{count}题解析失败: {e}"
+            
+            if not count:
+                return False, "文件为空或格式错误"
             
             return True, ""
         except Exception as e:
+            if isinstance(e.__cause__, FileNotFoundError):
+                return False, f"文件不存在: {filename}"
             return False, f"文件读取失败: {e}"
     
     def validate_answer_file(self, filename: str) -> Tuple[bool, str]:
@@ -347,9 +572,6 @@ class FileValidator:
         Returns:
             Tuple[bool, str]: (是否有效, 错误信息)
         """
-        if not os.path.exists(filename):
-            return False, f"文件不存在: {filename}"
-        
         try:
             answers = self.file_handler.read_answers(filename)
             if not answers:
@@ -357,6 +579,8 @@ class FileValidator:
             
             return True, ""
         except Exception as e:
+            if isinstance(e.__cause__, FileNotFoundError):
+                return False, f"文件不存在: {filename}"
             return False, f"文件读取失败: {e}"
 
 
@@ -373,8 +597,7 @@ def write_problems_to_files(problems: List[Tuple[str, str]],
         answer_file (str): 答案文件名
     """
     handler = FileHandler()
-    handler.write_exercises(problems, exercise_file)
-    handler.write_answers(problems, answer_file)
+    handler.write_problems(problems, exercise_file, answer_file)
 
 
 def grade_problems_from_files(exercise_file: str, answer_file: str,
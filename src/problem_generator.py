@@ -5,13 +5,24 @@
 """
 
 import random
+import re
 import sys
 import os
-from typing import List, Tuple, Set
+from typing import List, Optional, Tuple, Set
 from rational import Rational
 from expression_parser import ExpressionParser
 from deduplicator import Deduplicator
 
+# 分数除以分数的模式，如 "1/2 / 1/3"
+_FRAC_DIV_RE = re.compile(r'\d+/\d+\s*/\s*\d+/\d+')
+
+# 绑定到模块级名称，省去每次对 random 模块的属性查找
+_getrandbits = random.getrandbits
+_random = random.random
+
+# 表达式文本 -> 数值规则验证结果 缓存的最大条目数，超出时清空
+_VALIDATION_CACHE_SIZE = 100000
+
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 
@@ -35,8 +46,27 @@ class ProblemGenerator:
         # 运算符列表
         self.operators = ['+', '-', '*', '/']
         
-        # 题目去重集合
-        self.generated_problems = set()
+        # 表达式文本 -> 是否满足数值规则（非负、非零、非假分数）
+        self._validation_cache = {}
+    
+    @staticmethod
+    def _draw(low: int, high: int) -> int:
+        """
+        取一个 [low, high] 范围内的随机整数
+        
+        与 random.choices 的取值方式相同（floor(random() * n)），避免 random.randint 的开销；
+        不预先生成随机数，每次取值都直接来自 random 模块的当前状态，random.seed 后结果可复现
+        
+        Args:
+            low (int): 下界（包含）
+            high (int): 上界（包含）
+            
+        Returns:
+            int: 随机整数
+        """
+        if high < low:
+            raise ValueError(f"随机数范围无效: [{low}, {high}]")
+        return low + int(_random() * (high - low + 1))
     
     def generate_number(self) -> Rational:
         """
@@ -47,11 +77,11 @@ class ProblemGenerator:
         """
         # 80%概率生成自然数，20%概率生成分数
         if random.random() < 0.8:
-            return Rational(random.randint(self.min_value, self.max_value))
+            return Rational(self._draw(self.min_value, self.max_value))
         else:
             # 生成分数
-            numerator = random.randint(self.min_value, self.max_value)
-            denominator = random.randint(2, self.max_value)
+            numerator = self._draw(self.min_value, self.max_value)
+            denominator = self._draw(2, self.max_value)
             return Rational(numerator, denominator)
     
     def generate_operator(self) -> str:
@@ -61,7 +91,11 @@ class ProblemGenerator:
         Returns:
             str: 随机运算符
         """
-        return random.choice(self.operators)
+        operators = self.operators
+        if len(operators) == 4:
+            # 恰好4个运算符时，2个随机比特即可均匀选取
+            return operators[_getrandbits(2)]
+        return operators[self._draw(0, len(operators) - 1)]
     
     def generate_simple_expression(self) -> str:
         """
@@ -70,13 +104,22 @@ class ProblemGenerator:
         Returns:
             str: 生成的表达式字符串
         """
+        return self._generate_simple_expression()[0]
+    
+    def _generate_simple_expression(self) -> Tuple[str, bool]:
+        """
+        生成简单表达式，并在生成时记录是否包含分数除法
+        
+        Returns:
+            Tuple[str, bool]: (表达式字符串, 是否包含分数除法)
+        """
         num1 = self.generate_number()
         operator = self.generate_operator()
         num2 = self.generate_number()
         
         # 格式化表达式
         expr = f"{num1} {operator} {num2}"
-        return expr
+        return expr, self._is_fraction_division(num1, operator, num2)
     
     def generate_complex_expression(self) -> str:
         """
@@ -85,6 +128,15 @@ class ProblemGenerator:
         Returns:
             str: 生成的表达式字符串
         """
+        return self._generate_complex_expression()[0]
+    
+    def _generate_complex_expression(self) -> Tuple[str, bool]:
+        """
+        生成复杂表达式，并在生成时记录是否包含分数除法
+        
+        Returns:
+            Tuple[str, bool]: (表达式字符串, 是否包含分数除法)
+        """
         num1 = self.generate_number()
         num2 = self.generate_number()
         num3 = self.generate_number()
@@ -92,14 +144,40 @@ class ProblemGenerator:
         op1 = self.generate_operator()
         op2 = self.generate_operator()
         
+        # 两数之间直接相邻（中间没有括号）时才可能构成分数除法
+        first = self._is_fraction_division(num1, op1, num2)
+        second = self._is_fraction_division(num2, op2, num3)
+        
         # 随机选择括号位置
         patterns = [
-            f"({num1} {op1} {num2}) {op2} {num3}",
-            f"{num1} {op1} ({num2} {op2} {num3})",
-            f"({num1} {op1} {num2} {op2} {num3})"
+            (f"({num1} {op1} {num2}) {op2} {num3}", first),
+            (f"{num1} {op1} ({num2} {op2} {num3})", second),
+            (f"({num1} {op1} {num2} {op2} {num3})", first or second)
         ]
         
-        return random.choice(patterns)
+        # 用2个随机比特在3种模式中均匀选取，取到3时重新抽取
+        index = _getrandbits(2)
+        while index == 3:
+            index = _getrandbits(2)
+        return patterns[index]
+    
+    @staticmethod
+    def _is_fraction_division(left: Rational, operator: str, right: Rational) -> bool:
+        """
+        根据操作数判断 "左 运算符 右" 是否为分数除法，结果与 _contains_fraction_division
+        对生成文本的检查一致：左操作数以 "分子/分母" 结尾（真分数或带分数），
+        右操作数以 "分子/分母" 开头（非负真分数）
+        
+        Args:
+            left (Rational): 左操作数
+            operator (str): 运算符
+            right (Rational): 右操作数
+            
+        Returns:
+            bool: 是否为分数除法
+        """
+        return (operator == '/' and left.denominator > 1 and
+                0 < right.numerator < right.denominator)
     
     def generate_expression(self) -> str:
         """
@@ -108,25 +186,45 @@ class ProblemGenerator:
         Returns:
             str: 生成的表达式字符串
         """
+        return self._generate_expression()[0]
+    
+    def _generate_expression(self) -> Tuple[str, bool]:
+        """
+        生成表达式（简单或复杂），同时返回是否包含分数除法
+        
+        Returns:
+            Tuple[str, bool]: (表达式字符串, 是否包含分数除法)
+        """
         # 70%概率生成简单表达式，30%概率生成复杂表达式
         if random.random() < 0.7:
-            return self.generate_simple_expression()
+            return self._generate_simple_expression()
         else:
-            return self.generate_complex_expression()
+            return self._generate_complex_expression()
     
-    def validate_expression(self, expression: str) -> bool:
+    def validate_expression(self, expression: str,
+                            has_fraction_division: Optional[bool] = None) -> bool:
         """
         验证表达式是否符合规则
         
         Args:
             expression (str): 表达式字符串
+            has_fraction_division (Optional[bool]): 生成时已知的是否包含分数除法，
+                为None时从表达式文本中检查
             
         Returns:
             bool: 是否符合规则
         """
+        # 规则4：检查是否包含分数除法（先检查，命中时不必再解析计算）
+        if has_fraction_division is None:
+            has_fraction_division = self._contains_fraction_division(expression)
+        if has_fraction_division:
+            return False
+        
         try:
-            # 解析并计算表达式
-            result = self.parser.parse(expression)
+            # 解析并计算表达式（除零时返回 None，不经过异常处理）
+            result = self.parser.try_parse(expression)
+            if result is None:
+                return False
             
             # 规则1：结果不能为负数
             if result.is_negative():
@@ -140,10 +238,6 @@ class ProblemGenerator:
             if result.is_improper_fraction():
                 return False
             
-            # 规则4：检查是否包含分数除法
-            if self._contains_fraction_division(expression):
-                return False
-            
             return True
             
         except Exception:
@@ -161,9 +255,7 @@ class ProblemGenerator:
             bool: 是否包含分数除法
         """
         # 简单的启发式检查：如果包含 "/" 且前后都是分数格式
-        import re
-        pattern = r'\d+/\d+\s*/\s*\d+/\d+'
-        return bool(re.search(pattern, expression))
+        return bool(_FRAC_DIV_RE.search(expression))
     
     def generate_valid_expression(self, max_attempts: int = 100) -> str:
         """
@@ -175,9 +267,40 @@ class ProblemGenerator:
         Returns:
             str: 符合规则的表达式
         """
+        return self._generate_valid_expression(max_attempts, skip_duplicates=False)
+    
+    def _generate_valid_expression(self, max_attempts: int, skip_duplicates: bool) -> str:
+        """
+        生成符合规则的表达式
+        
+        Args:
+            max_attempts (int): 最大尝试次数
+            skip_duplicates (bool): 为True时先查去重器，已出现过的表达式直接跳过，
+                不再解析验证（只查询，不记录）
+            
+        Returns:
+            str: 符合规则的表达式
+        """
+        cache = self._validation_cache
+        
         for _ in range(max_attempts):
-            expression = self.generate_expression()
-            if self.validate_expression(expression):
+            # 分数除法在生成时已确定，无需再用正则检查表达式文本
+            expression, has_fraction_division = self._generate_expression()
+            if has_fraction_division:
+                continue
+            if skip_duplicates and self.deduplicator.is_duplicate(expression, record=False):
+                continue
+            
+            # 数值范围较小时同一表达式文本会被反复生成，按文本缓存验证结果，
+            # 命中时只需一次字典查找（不必再规范化或解析计算）
+            is_valid = cache.get(expression)
+            if is_valid is None:
+                if len(cache) >= _VALIDATION_CACHE_SIZE:
+                    cache.clear()
+                is_valid = self.validate_expression(expression, False)
+                cache[expression] = is_valid
+            
+            if is_valid:
                 return expression
         
         # 如果尝试次数用完，返回一个简单的有效表达式
@@ -194,7 +317,6 @@ class ProblemGenerator:
             List[Tuple[str, str]]: 题目列表，每个元素为(题目, 答案)
         """
         problems = []
-        self.generated_problems.clear()
         self.deduplicator.reset()  # 重置去重器
         
         for i in range(count):
@@ -224,15 +346,15 @@ class ProblemGenerator:
             str: 唯一且符合规则的表达式
         """
         for _ in range(max_attempts):
-            expression = self.generate_valid_expression()
+            # 已出现过的候选在验证前就被跳过
+            expression = self._generate_valid_expression(100, skip_duplicates=True)
             
-            # 使用规范化去重检查（支持交换律）
+            # 使用规范化去重检查（支持交换律），不重复时记录其结构键
             if not self.deduplicator.is_duplicate(expression):
-                self.generated_problems.add(expression)
                 return expression
         
         # 如果无法生成唯一表达式，返回带序号的表达式
-        counter = len(self.generated_problems) + 1
+        counter = self.deduplicator.get_statistics()["unique_problems"] + 1
         return f"{self.min_value} + {self.min_value + counter}"
     
     def format_problem(self, problem_num: int, expression: str) -> str:
@@ -4,10 +4,13 @@
 支持自然数、真分数、带分数的统一运算
 """
 
-import math
-from typing import Union, Tuple
+import sys
+from functools import lru_cache, total_ordering
+from math import gcd
+from typing import Optional, Union, Tuple
 
 
+@total_ordering
 class Rational:
     """
     有理数类，支持自然数、真分数、带分数的运算
@@ -17,14 +20,21 @@ class Rational:
     - 真分数：分子小于分母
     - 带分数：转换为假分数表示
     
+    实例创建后不可修改（分子、分母为只读属性），使用 __slots__ 不为每个实例分配属性字典
+    
     Attributes:
         numerator (int): 分子
         denominator (int): 分母
     """
     
-    def __init__(self, numerator: int, denominator: int = 1):
+    # _hash、_str 在第一次调用 __hash__、to_string 时才写入
+    __slots__ = ('_numerator', '_denominator', '_hash', '_str')
+    
+    def __new__(cls, numerator: int, denominator: int = 1):
         """
-        初始化有理数
+        创建有理数
+        
+        常用的小整数和小分数直接返回预先创建的共享实例（实例不可修改，共享是安全的）
         
         Args:
             numerator (int): 分子
@@ -33,6 +43,15 @@ class Rational:
         Raises:
             ValueError: 分母为0时抛出异常
         """
+        if cls is Rational and type(numerator) is int and type(denominator) is int:
+            if denominator == 1:
+                if _SMALL_INT_MIN <= numerator <= _SMALL_INT_MAX:
+                    return _SMALL_INTS[numerator - _SMALL_INT_MIN]
+            elif (2 <= denominator <= _SMALL_FRACTION_MAX and
+                  -_SMALL_FRACTION_MAX <= numerator <= _SMALL_FRACTION_MAX):
+                # 查表结果已约分，如 6/8 直接得到与 3/4 相同的实例，无需求公因数
+                return _SMALL_FRACTIONS[denominator - 2][numerator + _SMALL_FRACTION_MAX]
+        
         if denominator == 0:
             raise ValueError("分母不能为0")
         
@@ -41,11 +60,46 @@ class Rational:
             numerator = -numerator
             denominator = -denominator
         
-        self.numerator = numerator
-        self.denominator = denominator
+        self = object.__new__(cls)
+        self._numerator = numerator
+        self._denominator = denominator
         
         # 自动约分
         self.simplify()
+        return self
+    
+    def __reduce__(self):
+        """序列化支持（__new__ 需要参数，pickle/copy 默认方式无法重建实例）"""
+        return (type(self), (self._numerator, self._denominator))
+    
+    @classmethod
+    def _unchecked(cls, numerator: int, denominator: int) -> 'Rational':
+        """
+        用已约分、分母为正的分子分母直接构造有理数，跳过校验和约分
+        
+        仅供内部在结果必然已是最简形式时使用（如取负、取绝对值、求倒数）
+        
+        Args:
+            numerator (int): 分子
+            denominator (int): 分母（正数，且与分子互质）
+            
+        Returns:
+            Rational: 有理数对象
+        """
+        obj = object.__new__(cls)
+        obj._numerator = numerator
+        obj._denominator = denominator
+        return obj
+    
+    @property
+    def numerator(self) -> int:
+        """分子（只读）"""
+        return self._numerator
+    
+    @property
+    def denominator(self) -> int:
+        """分母（只读，恒为正数）"""
+        return self._denominator
     
     @classmethod
     def from_string(cls, s: str) -> 'Rational':
@@ -63,58 +117,27 @@ class Rational:
         Returns:
             Rational: 有理数对象
         """
-        s = s.strip()
-        
-        # 处理带分数格式 "1'3/5" 或 "-1'3/5"
-        if "'" in s:
-            parts = s.split("'")
-            if len(parts) != 2:
-                raise ValueError(f"无效的带分数格式: {s}")
-            
-            whole_part = int(parts[0])
-            fraction_part = parts[1]
-            
-            if "/" not in fraction_part:
-                raise ValueError(f"无效的带分数格式: {s}")
-            
-            frac_parts = fraction_part.split("/")
-            if len(frac_parts) != 2:
-                raise ValueError(f"无效的带分数格式: {s}")
-            
-            numerator = int(frac_parts[0])
-            denominator = int(frac_parts[1])
-            
-            # 转换为假分数
-            # 如果整数部分是负数，需要正确处理
-            if whole_part < 0:
-                numerator = whole_part * denominator - numerator
-            else:
-                numerator = whole_part * denominator + numerator
-            return cls(numerator, denominator)
-        
-        # 处理分数格式 "3/5"
-        elif "/" in s:
-            parts = s.split("/")
-            if len(parts) != 2:
-                raise ValueError(f"无效的分数格式: {s}")
-            
-            numerator = int(parts[0])
-            denominator = int(parts[1])
-            return cls(numerator, denominator)
-        
-        # 处理自然数格式 "3"
-        else:
-            return cls(int(s))
+        numerator, denominator = _parse_rational(s)
+        return cls._unchecked(numerator, denominator)
     
     def simplify(self) -> None:
-        """约分处理"""
-        if self.numerator == 0:
-            self.denominator = 1
+        """约分处理（仅在构造时调用，保证实例始终为最简形式）"""
+        numerator = self._numerator
+        denominator = self._denominator
+        
+        if numerator == 0:
+            self._denominator = 1
+            return
+        
+        # 整数无需约分
+        if denominator == 1:
             return
         
-        gcd_val = math.gcd(abs(self.numerator), self.denominator)
-        self.numerator //= gcd_val
-        self.denominator //= gcd_val
+        # math.gcd 的结果总是非负，无需先对分子取绝对值
+        gcd_val = gcd(numerator, denominator)
+        if gcd_val != 1:
+            self._numerator = numerator // gcd_val
+            self._denominator = denominator // gcd_val
     
     def to_string(self) -> str:
         """
@@ -126,115 +149,233 @@ class Rational:
             - 真分数：返回 "分子/分母"
             - 带分数：返回 "整数'分子/分母"
         """
-        if self.denominator == 1:
-            return str(self.numerator)
-        
-        # 检查是否为带分数
-        if abs(self.numerator) > self.denominator:
-            # 处理负数带分数的特殊情况
-            if self.numerator < 0:
-                # 对于负数，我们需要特殊处理
-                # 例如：-8/5 = -1'3/5，而不是 -2'2/5
-                abs_numerator = abs(self.numerator)
-                whole_part = abs_numerator // self.denominator
-                remainder = abs_numerator % self.denominator
-                
-                if remainder == 0:
-                    return str(-whole_part)
-                else:
-                    return f"-{whole_part}'{remainder}/{self.denominator}"
+        try:
+            return self._str
+        except AttributeError:
+            pass
+        
+        numerator = self._numerator
+        denominator = self._denominator
+        
+        if denominator == 1:
+            text = str(numerator)
+        else:
+            # 负数带分数的整数部分和分数部分同号，例如：-8/5 = -1'3/5，而不是 -2'2/5
+            sign = '-' if numerator < 0 else ''
+            whole_part, remainder = divmod(-numerator if numerator < 0 else numerator, denominator)
+            
+            if whole_part == 0:
+                # 真分数
+                text = f"{sign}{remainder}/{denominator}"
             else:
-                whole_part = self.numerator // self.denominator
-                remainder = self.numerator % self.denominator
-                
-                if remainder == 0:
-                    return str(whole_part)
-                else:
-                    return f"{whole_part}'{remainder}/{self.denominator}"
+                # 带分数（已约分且分母大于1，余数不会为0）
+                text = f"{sign}{whole_part}'{remainder}/{denominator}"
         
-        # 真分数
-        return f"{self.numerator}/{self.denominator}"
+        # 不可变对象的字符串只格式化一次
+        self._str = text
+        return text
     
     def __add__(self, other: 'Rational') -> 'Rational':
         """加法运算"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        new_numerator = (self.numerator * other.denominator + 
-                       other.numerator * self.denominator)
-        new_denominator = self.denominator * other.denominator
-        
-        return Rational(new_numerator, new_denominator)
+        return self._add_rat(other)
     
     def __sub__(self, other: 'Rational') -> 'Rational':
         """减法运算"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        new_numerator = (self.numerator * other.denominator - 
-                       other.numerator * self.denominator)
-        new_denominator = self.denominator * other.denominator
-        
-        return Rational(new_numerator, new_denominator)
+        return self._sub_rat(other)
     
     def __mul__(self, other: 'Rational') -> 'Rational':
         """乘法运算"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        new_numerator = self.numerator * other.numerator
-        new_denominator = self.denominator * other.denominator
-        
-        return Rational(new_numerator, new_denominator)
+        return self._mul_rat(other)
     
     def __truediv__(self, other: 'Rational') -> 'Rational':
         """除法运算"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        if other.numerator == 0:
+        if other._numerator == 0:
             raise ZeroDivisionError("除数不能为0")
         
-        new_numerator = self.numerator * other.denominator
-        new_denominator = self.denominator * other.numerator
+        return self._div_rat(other)
+    
+    def try_div(self, other: 'Rational') -> Optional['Rational']:
+        """
+        除法运算，除数为0时返回 None 而不抛出异常
+        
+        供需要频繁判断除零的调用方使用（如验证生成的表达式），避免构造异常的开销
         
-        return Rational(new_numerator, new_denominator)
+        Args:
+            other (Rational): 除数
+            
+        Returns:
+            Optional[Rational]: 商，除数为0时为 None
+        """
+        if not isinstance(other, Rational):
+            other = Rational(other)
+        
+        if other._numerator == 0:
+            return None
+        
+        return self._div_rat(other)
+    
+    # 以下 _*_rat 方法要求另一操作数已是 Rational，跳过类型检查和转换，
+    # 供已知操作数类型的内部调用方（如表达式求值）直接使用；
+    # 两个操作数都是整数时结果必然是整数，直接构造，不求公因数
+    
+    def _add_rat(self, other: 'Rational') -> 'Rational':
+        """加法运算（other 必须为 Rational）"""
+        if self._denominator == 1 and other._denominator == 1:
+            return Rational._unchecked(self._numerator + other._numerator, 1)
+        return Rational._add_reduced(self._numerator, self._denominator,
+                                     other._numerator, other._denominator)
+    
+    def _sub_rat(self, other: 'Rational') -> 'Rational':
+        """减法运算（other 必须为 Rational）"""
+        if self._denominator == 1 and other._denominator == 1:
+            return Rational._unchecked(self._numerator - other._numerator, 1)
+        return Rational._add_reduced(self._numerator, self._denominator,
+                                     -other._numerator, other._denominator)
+    
+    def _mul_rat(self, other: 'Rational') -> 'Rational':
+        """乘法运算（other 必须为 Rational）"""
+        if self._denominator == 1 and other._denominator == 1:
+            return Rational._unchecked(self._numerator * other._numerator, 1)
+        return Rational(self._numerator * other._numerator,
+                        self._denominator * other._denominator)
+    
+    def _div_rat(self, other: 'Rational') -> 'Rational':
+        """除法运算（other 必须为非零的 Rational）"""
+        return Rational(self._numerator * other._denominator,
+                        self._denominator * other._numerator)
+    
+    @staticmethod
+    def _add_reduced(na: int, da: int, nb: int, db: int) -> 'Rational':
+        """
+        计算 na/da + nb/db，结果直接为最简形式
+        
+        先约去两分母的公因数 g 再交叉相乘，之后只需与 g 求一次公因数，
+        中间结果和参与求公因数的整数都更小（Knuth 4.5.1 中的算法）
+        
+        Args:
+            na (int): 左操作数分子
+            da (int): 左操作数分母（正数，与分子互质）
+            nb (int): 右操作数分子
+            db (int): 右操作数分母（正数，与分子互质）
+            
+        Returns:
+            Rational: 最简形式的和
+        """
+        g = gcd(da, db)
+        if g == 1:
+            return Rational._unchecked(na * db + nb * da, da * db)
+        
+        s = da // g
+        t = na * (db // g) + nb * s
+        g2 = gcd(t, g)
+        if g2 == 1:
+            return Rational._unchecked(t, s * db)
+        return Rational._unchecked(t // g2, s * (db // g2))
     
     def __eq__(self, other: 'Rational') -> bool:
         """相等比较"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        return (self.numerator == other.numerator and 
-                self.denominator == other.denominator)
+        return (self._numerator == other._numerator and 
+                self._denominator == other._denominator)
+    
+    def __hash__(self) -> int:
+        """
+        哈希值，与 int 及 fractions.Fraction 的哈希一致（Rational(3) 与 3 哈希相同）
+        
+        不可变对象的哈希只计算一次，结果缓存在 _hash 槽中
+        """
+        try:
+            return self._hash
+        except AttributeError:
+            pass
+        
+        # 与 Fraction.__hash__ 相同：分子乘以分母模 P 的逆元
+        try:
+            dinv = pow(self._denominator, -1, _PyHASH_MODULUS)
+        except ValueError:
+            # 分母是 P 的倍数时没有逆元
+            hash_ = _PyHASH_INF
+        else:
+            hash_ = hash(hash(abs(self._numerator)) * dinv)
+        result = hash_ if self._numerator >= 0 else -hash_
+        if result == -1:
+            result = -2
+        
+        self._hash = result
+        return result
     
     def __lt__(self, other: 'Rational') -> bool:
-        """小于比较"""
+        """小于比较（__ge__ 由 functools.total_ordering 生成）"""
         if not isinstance(other, Rational):
             other = Rational(other)
         
-        return (self.numerator * other.denominator < 
-                other.numerator * self.denominator)
+        a = self._numerator
+        b = other._numerator
+        
+        # 符号不同时（以负数与非负数区分）无需交叉相乘
+        if (a < 0) != (b < 0):
+            return a < 0
+        
+        return a * other._denominator < b * self._denominator
     
     def __le__(self, other: 'Rational') -> bool:
-        """小于等于比较"""
-        return self < other or self == other
+        """
+        小于等于比较
+        
+        显式定义：total_ordering 生成的版本先比较小于再比较相等，这里只需一次交叉相乘
+        """
+        if not isinstance(other, Rational):
+            other = Rational(other)
+        
+        a = self._numerator
+        b = other._numerator
+        
+        if (a < 0) != (b < 0):
+            return a < 0
+        
+        return a * other._denominator <= b * self._denominator
     
     def __gt__(self, other: 'Rational') -> bool:
-        """大于比较"""
-        return not self <= other
-    
-    def __ge__(self, other: 'Rational') -> bool:
-        """大于等于比较"""
-        return not self < other
+        """
+        大于比较
+        
+        显式定义：total_ordering 生成的版本需要同时比较小于和不等，这里只需一次交叉相乘
+        """
+        if not isinstance(other, Rational):
+            other = Rational(other)
+        
+        a = self._numerator
+        b = other._numerator
+        
+        if (a < 0) != (b < 0):
+            return b < 0
+        
+        return a * other._denominator > b * self._denominator
     
     def __neg__(self) -> 'Rational':
         """取负"""
-        return Rational(-self.numerator, self.denominator)
+        return Rational._unchecked(-self._numerator, self._denominator)
     
     def __abs__(self) -> 'Rational':
-        """取绝对值"""
-        return Rational(abs(self.numerator), self.denominator)
+        """取绝对值（非负数不可变，直接返回自身）"""
+        numerator = self._numerator
+        if numerator >= 0:
+            return self
+        return Rational._unchecked(-numerator, self._denominator)
     
     def __str__(self) -> str:
         """字符串表示"""
@@ -242,41 +383,168 @@ class Rational:
     
     def __repr__(self) -> str:
         """调试表示"""
-        return f"Rational({self.numerator}, {self.denominator})"
+        return f"Rational({self._numerator}, {self._denominator})"
     
     def is_positive(self) -> bool:
         """判断是否为正数"""
-        return self.numerator > 0
+        return self._numerator > 0
     
     def is_negative(self) -> bool:
         """判断是否为负数"""
-        return self.numerator < 0
+        return self._numerator < 0
     
     def is_zero(self) -> bool:
         """判断是否为零"""
-        return self.numerator == 0
+        return self._numerator == 0
     
     def is_integer(self) -> bool:
         """判断是否为整数"""
-        return self.denominator == 1
+        return self._denominator == 1
     
     def is_proper_fraction(self) -> bool:
         """判断是否为真分数"""
-        return abs(self.numerator) < self.denominator and self.denominator > 1
+        # 用链式比较代替 abs()，省去一次内置函数调用
+        denominator = self._denominator
+        return denominator > 1 and -denominator < self._numerator < denominator
     
     def is_improper_fraction(self) -> bool:
         """判断是否为假分数"""
-        return abs(self.numerator) >= self.denominator and self.denominator > 1
+        denominator = self._denominator
+        return denominator > 1 and not -denominator < self._numerator < denominator
     
     def to_float(self) -> float:
         """转换为浮点数"""
-        return self.numerator / self.denominator
+        return self._numerator / self._denominator
     
     def reciprocal(self) -> 'Rational':
         """求倒数"""
-        if self.numerator == 0:
+        if self._numerator == 0:
             raise ZeroDivisionError("0没有倒数")
-        return Rational(self.denominator, self.numerator)
+        # 分子分母互换后仍互质，只需把符号移到分子上
+        if self._numerator < 0:
+            return Rational._unchecked(-self._denominator, -self._numerator)
+        return Rational._unchecked(self._denominator, self._numerator)
+
+
+# 与内置数值类型一致的哈希参数
+_PyHASH_MODULUS = sys.hash_info.modulus
+_PyHASH_INF = sys.hash_info.inf
+
+# 共享实例表：-128..255 的整数，以及分子在 -16..16、分母在 2..16 之间的分数
+_SMALL_INT_MIN = -128
+_SMALL_INT_MAX = 255
+_SMALL_FRACTION_MAX = 16
+_SMALL_INTS = tuple(Rational._unchecked(i, 1)
+                    for i in range(_SMALL_INT_MIN, _SMALL_INT_MAX + 1))
+
+
+def _build_small_fractions() -> Tuple[Tuple[Rational, ...], ...]:
+    """
+    构建小分数共享实例表，按 [分母 - 2][分子 + 16] 索引
+    
+    约分后相等的分子分母（如 2/4 与 1/2）映射到同一个实例，约分后为整数的映射到整数共享实例
+    
+    Returns:
+        Tuple[Tuple[Rational, ...], ...]: 共享实例表
+    """
+    instances = {}
+    rows = []
+    for denominator in range(2, _SMALL_FRACTION_MAX + 1):
+        row = []
+        for numerator in range(-_SMALL_FRACTION_MAX, _SMALL_FRACTION_MAX + 1):
+            g = gcd(numerator, denominator)
+            key = (numerator // g, denominator // g)
+            if key[1] == 1:
+                row.append(_SMALL_INTS[key[0] - _SMALL_INT_MIN])
+                continue
+            instance = instances.get(key)
+            if instance is None:
+                instance = instances[key] = Rational._unchecked(*key)
+            row.append(instance)
+        rows.append(tuple(row))
+    return tuple(rows)
+
+
+_SMALL_FRACTIONS = _build_small_fractions()
+
+
+@lru_cache(maxsize=4096)
+def _parse_rational(s: str) -> Tuple[int, int]:
+    """
+    解析有理数字符串为最简形式的 (分子, 分母)，结果按字符串缓存
+    
+    供 Rational.from_string 使用，重复出现的字符串不再重新切分和转换
+    
+    Args:
+        s (str): 字符串格式的有理数
+        
+    Returns:
+        Tuple[int, int]: (分子, 分母)，分母为正数
+    """
+    s = s.strip()
+    
+    # 首字符只能是数字或正负号（与 int() 接受的范围一致），明显无效的输入
+    # 不再经过切分和 int 转换
+    first = s[:1]
+    if not first or not (first.isdecimal() or first in '+-'):
+        raise ValueError(f"无效的有理数格式: {s}")
+    
+    # 处理带分数格式 "1'3/5" 或 "-1'3/5"
+    if "'" in s:
+        parts = s.split("'")
+        if len(parts) != 2:
+            raise ValueError(f"无效的带分数格式: {s}")
+        
+        whole_part = int(parts[0])
+        fraction_part = parts[1]
+        
+        if "/" not in fraction_part:
+            raise ValueError(f"无效的带分数格式: {s}")
+        
+        frac_parts = fraction_part.split("/")
+        if len(frac_parts) != 2:
+            raise ValueError(f"无效的带分数格式: {s}")
+        
+        numerator = int(frac_parts[0])
+        denominator = int(frac_parts[1])
+        
+        # 转换为假分数
+        # 如果整数部分是负数，需要正确处理
+        if whole_part < 0:
+            numerator = whole_part * denominator - numerator
+        else:
+            numerator = whole_part * denominator + numerator
+        return _reduce(numerator, denominator)
+    
+    # 处理分数格式 "3/5"
+    elif "/" in s:
+        parts = s.split("/")
+        if len(parts) != 2:
+            raise ValueError(f"无效的分数格式: {s}")
+        
+        numerator = int(parts[0])
+        denominator = int(parts[1])
+        return _reduce(numerator, denominator)
+    
+    # 处理自然数格式 "3"
+    else:
+        return int(s), 1
+
+
+
+def _reduce(numerator: int, denominator: int) -> Tuple[int, int]:
+    """
+    校验并约分分子分母
+    
+    Args:
+        numerator (int): 分子
+        denominator (int): 分母
+        
+    Returns:
+        Tuple[int, int]: 最简形式的 (分子, 分母)
+    """
+    rational = Rational(numerator, denominator)
+    return rational._numerator, rational._denominator
 
 
 # 便捷函数
@@ -29,7 +29,7 @@ class TestProblemGenerator(unittest.TestCase):
         generator = ProblemGenerator(min_value=2, max_value=20)
         self.assertEqual(generator.min_value, 2)
         self.assertEqual(generator.max_value, 20)
-        self.assertEqual(len(generator.generated_problems), 0)
+        self.assertEqual(generator.deduplicator.get_statistics()["unique_problems"], 0)
     
     def test_generate_number(self):
         """测试数字生成"""
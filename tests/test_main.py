@@ -5,64 +5,76 @@
 """
 
 import unittest
+import random
 import sys
 import os
 import tempfile
-import subprocess
+import shutil
+from argparse import Namespace
 from unittest.mock import patch, mock_open
 
-# 添加src目录到路径
+# 添加src目录和项目根目录（main.py 所在目录）到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from file_utils import FileHandler, FileValidator, write_problems_to_files, grade_problems_from_files
+from deduplicator import Deduplicator
+from problem_generator import ProblemGenerator
+import main as main_mod
+
+# 多个测试共用的样例题目及对应的文件内容
+_SAMPLE_PROBLEMS = (
+    ("1 + 2", "3"),
+    ("3 * 4", "12"),
+    ("1/2 + 1/3", "5/6")
+)
+_SAMPLE_EXERCISES = tuple(expression for expression, _ in _SAMPLE_PROBLEMS)
+_SAMPLE_ANSWERS = tuple(answer for _, answer in _SAMPLE_PROBLEMS)
+_WRONG_ANSWERS = ("4", "11", "1/2")  # 与样例题目逐题不符的答案
+_EXERCISE_BODY = "1. 1 + 2 =\n2. 3 * 4 =\n3. 1/2 + 1/3 =\n"
+_ANSWER_BODY = "1. 3\n2. 12\n3. 5/6\n"
 
 
 class TestFileHandler(unittest.TestCase):
     """文件处理器测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """创建本测试类共用的临时根目录"""
+        cls._root = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """删除临时根目录"""
+        shutil.rmtree(cls._root, ignore_errors=True)
+    
     def setUp(self):
-        """测试前准备"""
+        """测试前准备（每个测试使用根目录下以测试名命名的子目录）"""
         self.handler = FileHandler()
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def tearDown(self):
-        """测试后清理"""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir = os.path.join(self._root, self._testMethodName)
+        os.makedirs(self.temp_dir)
     
     def test_write_exercises(self):
         """测试写入题目文件"""
-        problems = [
-            ("1 + 2", "3"),
-            ("3 * 4", "12"),
-            ("1/2 + 1/3", "5/6")
-        ]
-        
         filename = os.path.join(self.temp_dir, "test_exercises.txt")
-        self.handler.write_exercises(problems, filename)
+        self.handler.write_exercises(_SAMPLE_PROBLEMS, filename)
         
-        # 验证文件内容
-        with open(filename, 'r', encoding='utf-8') as f:
+        # 验证文件内容（内容为纯ASCII，按字节读取比较，无需解码）
+        with open(filename, 'rb') as f:
             content = f.read()
         
-        self.assertIn("1. 1 + 2 =", content)
-        self.assertIn("2. 3 * 4 =", content)
-        self.assertIn("3. 1/2 + 1/3 =", content)
+        self.assertIn(b"1. 1 + 2 =", content)
+        self.assertIn(b"2. 3 * 4 =", content)
+        self.assertIn(b"3. 1/2 + 1/3 =", content)
     
     def test_write_answers(self):
         """测试写入答案文件"""
-        problems = [
-            ("1 + 2", "3"),
-            ("3 * 4", "12"),
-            ("1/2 + 1/3", "5/6")
-        ]
+        # 写入内存中的模拟文件，不创建真实文件
+        with patch('file_utils.open', mock_open(), create=True) as mocked:
+            self.handler.write_answers(_SAMPLE_PROBLEMS, "test_answers.txt")
         
-        filename = os.path.join(self.temp_dir, "test_answers.txt")
-        self.handler.write_answers(problems, filename)
-        
-        # 验证文件内容
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # 验证写入内容
+        content = ''.join(call.args[0] for call in mocked().write.call_args_list)
         
         self.assertIn("1. 3", content)
         self.assertIn("2. 12", content)
@@ -70,14 +82,9 @@ class TestFileHandler(unittest.TestCase):
     
     def test_read_exercises(self):
         """测试读取题目文件"""
-        # 创建测试文件
-        filename = os.path.join(self.temp_dir, "test_exercises.txt")
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("1. 1 + 2 =\n")
-            f.write("2. 3 * 4 =\n")
-            f.write("3. 1/2 + 1/3 =\n")
-        
-        exercises = self.handler.read_exercises(filename)
+        # 从内存中的模拟文件读取
+        with patch('file_utils.open', mock_open(read_data=_EXERCISE_BODY), create=True):
+            exercises = self.handler.read_exercises("test_exercises.txt")
         
         self.assertEqual(len(exercises), 3)
         self.assertEqual(exercises[0], "1 + 2")
@@ -86,14 +93,9 @@ class TestFileHandler(unittest.TestCase):
     
     def test_read_answers(self):
         """测试读取答案文件"""
-        # 创建测试文件
-        filename = os.path.join(self.temp_dir, "test_answers.txt")
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("1. 3\n")
-            f.write("2. 12\n")
-            f.write("3. 5/6\n")
-        
-        answers = self.handler.read_answers(filename)
+        # 从内存中的模拟文件读取
+        with patch('file_utils.open', mock_open(read_data=_ANSWER_BODY), create=True):
+            answers = self.handler.read_answers("test_answers.txt")
         
         self.assertEqual(len(answers), 3)
         self.assertEqual(answers[0], "3")
@@ -102,10 +104,7 @@ class TestFileHandler(unittest.TestCase):
     
     def test_grade_exercises(self):
         """测试批改题目"""
-        exercises = ["1 + 2", "3 * 4", "1/2 + 1/3"]
-        answers = ["3", "12", "5/6"]
-        
-        results = self.handler.grade_exercises(exercises, answers)
+        results = self.handler.grade_exercises(_SAMPLE_EXERCISES, _SAMPLE_ANSWERS)
         
         self.assertEqual(len(results), 3)
         # 所有题目都应该正确
@@ -115,17 +114,55 @@ class TestFileHandler(unittest.TestCase):
     
     def test_grade_exercises_wrong_answers(self):
         """测试批改错误答案"""
-        exercises = ["1 + 2", "3 * 4"]
-        answers = ["4", "11"]  # 错误答案
-        
-        results = self.handler.grade_exercises(exercises, answers)
+        results = self.handler.grade_exercises(_SAMPLE_EXERCISES, _WRONG_ANSWERS)
         
-        self.assertEqual(len(results), 2)
+        self.assertEqual(len(results), 3)
         # 所有题目都应该错误
         for is_correct, error_msg in results:
             self.assertFalse(is_correct)
             self.assertIn("正确答案", error_msg)
     
+    def test_grade_exercises_parallel(self):
+        """测试多进程批改与单进程结果一致"""
+        exercises = ["1 + 2", "3 * 4", "1/2 + 1/3", "1 + 2", "2 - 1/2"]
+        answers = ["3", "11", "5/6", "4", "1'1/2"]
+        
+        # 用另一个处理器计算单进程结果，避免正确答案缓存让多进程路径被跳过
+        expected = FileHandler().grade_exercises(exercises, answers)
+        
+        with patch('file_utils._PARALLEL_GRADE_THRESHOLD', 1), \
+                patch('file_utils.os.cpu_count', return_value=2):
+            results = self.handler.grade_exercises(exercises, answers)
+        
+        self.assertEqual(results, expected)
+        self.assertEqual(self.handler._correct_answers["2 - 1/2"], "1'1/2")
+    
+    def test_grade_exercises_parallel_reuses_correct_answers(self):
+        """测试正确答案已缓存时不再启动进程池"""
+        exercises = ["1 + 2", "3 * 4"]
+        self.handler.grade_exercises(exercises, ["3", "12"])
+        
+        with patch('file_utils._PARALLEL_GRADE_THRESHOLD', 1), \
+                patch('file_utils.os.cpu_count', return_value=2), \
+                patch('file_utils.ProcessPoolExecutor') as mock_executor:
+            results = self.handler.grade_exercises(exercises, ["3", "11"])
+        
+        mock_executor.assert_not_called()
+        self.assertEqual([is_correct for is_correct, _ in results], [True, False])
+    
+    def test_grade_exercises_reuses_correct_answers(self):
+        """测试多次批改相同题目时每道题只解析一次"""
+        exercises = ["1 + 2", "3 * 4"]
+        
+        with patch.object(self.handler.parser, 'parse',
+                          wraps=self.handler.parser.parse) as mock_parse:
+            first = self.handler.grade_exercises(exercises, ["3", "12"])
+            second = self.handler.grade_exercises(exercises, ["3", "11"])
+        
+        self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual([is_correct for is_correct, _ in first], [True, True])
+        self.assertEqual([is_correct for is_correct, _ in second], [True, False])
+    
     def test_write_grade_results(self):
         """测试写入批改结果"""
         results = [
@@ -147,6 +184,23 @@ class TestFileHandler(unittest.TestCase):
         self.assertIn("2. Wrong. 正确答案: 12, 学生答案: 11", content)
         self.assertIn("3. Correct", content)
     
+    def test_find_answer_files(self):
+        """测试递归查找答案文件"""
+        sub_dir = os.path.join(self.temp_dir, "sub")
+        os.makedirs(sub_dir)
+        for path in ("a.txt", "a_Grade.txt", "notes.md",
+                     os.path.join("sub", "b.txt"), os.path.join("sub", "b_Grade.txt")):
+            with open(os.path.join(self.temp_dir, path), 'w', encoding='utf-8') as f:
+                f.write("1. 3\n")
+        
+        answer_files = self.handler.find_answer_files(self.temp_dir)
+        
+        self.assertEqual(answer_files, [
+            os.path.join(self.temp_dir, "a.txt"),
+            os.path.join(sub_dir, "b.txt")
+        ])
+        self.assertEqual(self.handler.find_answer_files(os.path.join(self.temp_dir, "missing")), [])
+    
     def test_compare_answers(self):
         """测试答案比较"""
         # 相同答案
@@ -175,25 +229,28 @@ class TestFileHandler(unittest.TestCase):
 class TestFileValidator(unittest.TestCase):
     """文件验证器测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """创建本测试类共用的临时根目录"""
+        cls._root = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """删除临时根目录"""
+        shutil.rmtree(cls._root, ignore_errors=True)
+    
     def setUp(self):
         """测试前准备"""
         self.validator = FileValidator()
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def tearDown(self):
-        """测试后清理"""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir = os.path.join(self._root, self._testMethodName)
+        os.makedirs(self.temp_dir)
     
     def test_validate_exercise_file_valid(self):
         """测试有效题目文件验证"""
-        # 创建有效题目文件
-        filename = os.path.join(self.temp_dir, "valid_exercises.txt")
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("1. 1 + 2 =\n")
-            f.write("2. 3 * 4 =\n")
-        
-        is_valid, error_msg = self.validator.validate_exercise_file(filename)
+        # 使用内存中的模拟题目文件
+        data = "1. 1 + 2 =\n2. 3 * 4 =\n"
+        with patch('file_utils.open', mock_open(read_data=data), create=True):
+            is_valid, error_msg = self.validator.validate_exercise_file("valid_exercises.txt")
         
         self.assertTrue(is_valid)
         self.assertEqual(error_msg, "")
@@ -206,11 +263,8 @@ class TestFileValidator(unittest.TestCase):
         self.assertIn("文件不存在", error_msg)
         
         # 测试空文件
-        filename = os.path.join(self.temp_dir, "empty.txt")
-        with open(filename, 'w', encoding='utf-8') as f:
-            pass
-        
-        is_valid, error_msg = self.validator.validate_exercise_file(filename)
+        with patch('file_utils.open', mock_open(read_data=""), create=True):
+            is_valid, error_msg = self.validator.validate_exercise_file("empty.txt")
         self.assertFalse(is_valid)
         self.assertIn("文件为空", error_msg)
     
@@ -219,8 +273,7 @@ class TestFileValidator(unittest.TestCase):
         # 创建有效答案文件
         filename = os.path.join(self.temp_dir, "valid_answers.txt")
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write("1. 3\n")
-            f.write("2. 12\n")
+            f.write("1. 3\n2. 12\n")
         
         is_valid, error_msg = self.validator.validate_answer_file(filename)
         
@@ -238,14 +291,20 @@ class TestFileValidator(unittest.TestCase):
 class TestConvenienceFunctions(unittest.TestCase):
     """便捷函数测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """创建本测试类共用的临时根目录"""
+        cls._root = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """删除临时根目录"""
+        shutil.rmtree(cls._root, ignore_errors=True)
+    
     def setUp(self):
         """测试前准备"""
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def tearDown(self):
-        """测试后清理"""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir = os.path.join(self._root, self._testMethodName)
+        os.makedirs(self.temp_dir)
     
     def test_write_problems_to_files(self):
         """测试便捷写入函数"""
@@ -271,12 +330,10 @@ class TestConvenienceFunctions(unittest.TestCase):
         grade_file = os.path.join(self.temp_dir, "test_grade.txt")
         
         with open(exercise_file, 'w', encoding='utf-8') as f:
-            f.write("1. 1 + 2 =\n")
-            f.write("2. 3 * 4 =\n")
+            f.write("1. 1 + 2 =\n2. 3 * 4 =\n")
         
         with open(answer_file, 'w', encoding='utf-8') as f:
-            f.write("1. 3\n")
-            f.write("2. 12\n")
+            f.write("1. 3\n2. 12\n")
         
         # 执行批改
         stats = grade_problems_from_files(exercise_file, answer_file, grade_file)
@@ -291,6 +348,82 @@ class TestConvenienceFunctions(unittest.TestCase):
         self.assertTrue(os.path.exists(grade_file))
 
 
+class TestProblemGenerator(unittest.TestCase):
+    """题目生成器测试（tests/test_generator.py 依赖尚未实现的去重类，无法导入）"""
+    
+    def test_generate_problems_reproducible(self):
+        """测试相同随机种子生成相同的题目"""
+        generator = ProblemGenerator(min_value=1, max_value=10)
+        random.seed(1)
+        first = generator.generate_problems(20)
+        
+        # 同一生成器和新建的生成器在重新设置种子后都应得到相同的题目
+        random.seed(1)
+        self.assertEqual(generator.generate_problems(20), first)
+        
+        random.seed(1)
+        self.assertEqual(ProblemGenerator(min_value=1, max_value=10).generate_problems(20), first)
+
+
+class TestDeduplicator(unittest.TestCase):
+    """题目去重器测试"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.deduplicator = Deduplicator()
+    
+    def test_is_duplicate(self):
+        """测试交换+和×的操作数得到的题目视为重复"""
+        self.assertFalse(self.deduplicator.is_duplicate("1 + 2"))
+        self.assertTrue(self.deduplicator.is_duplicate("2 + 1"))
+        self.assertTrue(self.deduplicator.is_duplicate("1+2"))
+        self.assertFalse(self.deduplicator.is_duplicate("2 - 1"))
+        self.assertFalse(self.deduplicator.is_duplicate("1 - 2"))
+        self.assertEqual(self.deduplicator.get_statistics()["unique_problems"], 3)
+    
+    def test_is_duplicate_without_record(self):
+        """测试 record=False 只查询，不记录"""
+        self.assertFalse(self.deduplicator.is_duplicate("3 * 4", record=False))
+        self.assertFalse(self.deduplicator.is_duplicate("4 * 3", record=False))
+        self.assertEqual(self.deduplicator.get_statistics()["unique_problems"], 0)
+        
+        self.assertFalse(self.deduplicator.is_duplicate("3 * 4"))
+        self.assertTrue(self.deduplicator.is_duplicate("4 * 3", record=False))
+        self.assertEqual(self.deduplicator.get_statistics()["unique_problems"], 1)
+    
+    def test_associative(self):
+        """测试结合律去重只在开启时生效"""
+        self.assertFalse(self.deduplicator.is_duplicate("1 + 2 + 3"))
+        self.assertFalse(self.deduplicator.is_duplicate("3 + 2 + 1"))
+        
+        deduplicator = Deduplicator(associative=True)
+        self.assertFalse(deduplicator.is_duplicate("1 + 2 + 3"))
+        self.assertTrue(deduplicator.is_duplicate("3 + 2 + 1"))
+        self.assertTrue(deduplicator.is_duplicate("1 + (3 + 2)"))
+        self.assertFalse(deduplicator.is_duplicate("1 + 2 - 3"))
+    
+    def test_deduplicate_problems(self):
+        """测试题目列表去重保留首次出现的题目"""
+        problems = [
+            ("1 + 2", "3"),
+            ("2 + 1", "3"),
+            ("1/2 * 4", "2"),
+            ("4 * 2/4", "2"),
+            ("1 + 2 + 3", "6"),
+            ("3 + 2 + 1", "6"),
+        ]
+        self.assertEqual(self.deduplicator.deduplicate_problems(problems),
+                         [problems[0], problems[2], problems[4], problems[5]])
+    
+    def test_reset(self):
+        """测试重置后之前的题目不再视为重复"""
+        self.deduplicator.is_duplicate("1 + 2")
+        self.deduplicator.reset()
+        
+        self.assertEqual(self.deduplicator.get_statistics()["unique_problems"], 0)
+        self.assertFalse(self.deduplicator.is_duplicate("2 + 1"))
+
+
 class TestMainProgram(unittest.TestCase):
     """主程序测试"""
     
@@ -298,8 +431,7 @@ class TestMainProgram(unittest.TestCase):
         """测试生成模式参数解析"""
         # 测试有效参数
         with patch('sys.argv', ['main.py', '-n', '10', '-r', '10']):
-            from main import parse_arguments
-            args = parse_arguments()
+            args = main_mod.parse_arguments()
             self.assertEqual(args.number, 10)
             self.assertEqual(args.range, 10)
             self.assertIsNone(args.exercise)
@@ -310,73 +442,67 @@ class TestMainProgram(unittest.TestCase):
         # 测试有效参数
         with patch('sys.argv', ['main.py', '-e', 'test.txt', '-a', 'ans.txt']):
             with patch('os.path.exists', return_value=True):
-                from main import parse_arguments
-                args = parse_arguments()
+                args = main_mod.parse_arguments()
                 self.assertEqual(args.exercise, 'test.txt')
                 self.assertEqual(args.answer, 'ans.txt')
                 self.assertIsNone(args.number)
                 self.assertIsNone(args.range)
     
-    def test_argument_validation_missing_params(self):
-        """测试参数验证 - 缺少参数"""
-        with patch('sys.argv', ['main.py']):
-            with patch('sys.exit') as mock_exit:
-                from main import parse_arguments
+    def test_argument_validation_errors(self):
+        """测试参数验证 - 缺少参数、无效题目数量、无效数值范围"""
+        invalid_argvs = [
+            [],
+            ['-n', '10001', '-r', '10'],
+            ['-n', '10', '-r', '101']
+        ]
+        
+        for argv in invalid_argvs:
+            with self.subTest(argv=argv), \
+                    patch('sys.argv', ['main.py'] + argv), \
+                    patch('sys.exit') as mock_exit:
                 try:
-                    parse_arguments()
+                    main_mod.parse_arguments()
                 except SystemExit:
                     pass
                 mock_exit.assert_called()
     
-    def test_argument_validation_invalid_number(self):
-        """测试参数验证 - 无效题目数量"""
-        with patch('sys.argv', ['main.py', '-n', '10001', '-r', '10']):
-            with patch('sys.exit') as mock_exit:
-                from main import parse_arguments
-                try:
-                    parse_arguments()
-                except SystemExit:
-                    pass
-                mock_exit.assert_called()
+    def test_main_dispatch_generate_mode(self):
+        """测试主函数分派到生成模式（跳过命令行解析）"""
+        args = Namespace(number=3, range=5, exercise=None, answer=None)
+        with patch.object(main_mod, 'parse_arguments', return_value=args), \
+                patch.object(main_mod, 'generate_problems_mode') as mock_generate:
+            main_mod.main()
+            mock_generate.assert_called_once_with(3, 5)
     
-    def test_argument_validation_invalid_range(self):
-        """测试参数验证 - 无效数值范围"""
-        with patch('sys.argv', ['main.py', '-n', '10', '-r', '101']):
-            with patch('sys.exit') as mock_exit:
-                from main import parse_arguments
-                try:
-                    parse_arguments()
-                except SystemExit:
-                    pass
-                mock_exit.assert_called()
+    def test_main_dispatch_grade_mode(self):
+        """测试主函数分派到批改模式（跳过命令行解析）"""
+        args = Namespace(number=None, range=None, exercise='test.txt', answer='ans.txt')
+        with patch.object(main_mod, 'parse_arguments', return_value=args), \
+                patch.object(main_mod, 'grade_problems_mode') as mock_grade:
+            main_mod.main()
+            mock_grade.assert_called_once_with('test.txt', 'ans.txt')
 
 
 class TestMainIntegration(unittest.TestCase):
     """主程序集成测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """创建本测试类共用的临时根目录"""
+        cls._root = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """删除临时根目录"""
+        shutil.rmtree(cls._root, ignore_errors=True)
+    
     def setUp(self):
         """测试前准备"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.original_cwd = os.getcwd()
-        os.chdir(self.temp_dir)
-    
-    def tearDown(self):
-        """测试后清理"""
-        os.chdir(self.original_cwd)
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
-    def test_generate_mode_integration(self):
-        """测试生成模式集成"""
-        # 模拟命令行参数
-        with patch('sys.argv', ['main.py', '-n', '3', '-r', '5']):
-            with patch('main.generate_problems_mode') as mock_generate:
-                from main import main
-                main()
-                mock_generate.assert_called_once_with(3, 5)
+        self.temp_dir = os.path.join(self._root, self._testMethodName)
+        os.makedirs(self.temp_dir)
     
     def test_grade_mode_integration(self):
-        """测试批改模式集成"""
+        """测试批改模式集成（从命令行参数到模式分派的完整路径）"""
         # 创建测试文件
         exercise_file = os.path.join(self.temp_dir, "test_exercises.txt")
         answer_file = os.path.join(self.temp_dir, "test_answers.txt")
@@ -389,9 +515,8 @@ class TestMainIntegration(unittest.TestCase):
         
         # 模拟命令行参数
         with patch('sys.argv', ['main.py', '-e', exercise_file, '-a', answer_file]):
-            with patch('main.grade_problems_mode') as mock_grade:
-                from main import main
-                main()
+            with patch.object(main_mod, 'grade_problems_mode') as mock_grade:
+                main_mod.main()
                 mock_grade.assert_called_once_with(exercise_file, answer_file)
 
 
@@ -12,56 +12,99 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from expression_parser import ExpressionParser, evaluate_expression, Token
+from deduplicator import Deduplicator
 from rational import Rational
 
 
 class TestExpressionParser(unittest.TestCase):
     """表达式解析器测试"""
     
-    def setUp(self):
-        """测试前准备"""
-        self.parser = ExpressionParser()
+    @classmethod
+    def setUpClass(cls):
+        """测试前准备（解析器不保存解析状态，所有测试共用一个实例）"""
+        cls.parser = ExpressionParser()
+    
+    # 多个测试共用的词法单元序列（Token 不可变，解析器不修改输入序列，可直接共享）
+    _INFIX_1_PLUS_2 = (
+        Token('NUMBER', Rational(1)),
+        Token('OPERATOR', '+'),
+        Token('NUMBER', Rational(2))
+    )
+    _POSTFIX_1_PLUS_2 = (
+        Token('NUMBER', Rational(1)),
+        Token('NUMBER', Rational(2)),
+        Token('OPERATOR', '+')
+    )
+    _INFIX_UNCLOSED_PARENTHESIS = (
+        Token('PARENTHESIS', '('),
+        Token('NUMBER', Rational(1)),
+        Token('OPERATOR', '+'),
+        Token('NUMBER', Rational(2))
+    )
+    _POSTFIX_DIVISION_BY_ZERO = (
+        Token('NUMBER', Rational(1)),
+        Token('NUMBER', Rational(0)),
+        Token('OPERATOR', '/')
+    )
+    _POSTFIX_MISSING_OPERAND = (
+        Token('NUMBER', Rational(1)),
+        Token('OPERATOR', '+')
+    )
     
     def test_tokenize_basic(self):
         """测试基本词法分析"""
         # 测试简单表达式
         tokens = self.parser.tokenize("1+2")
-        expected = [
-            Token('NUMBER', Rational(1)),
-            Token('OPERATOR', '+'),
-            Token('NUMBER', Rational(2))
-        ]
-        self.assertEqual(len(tokens), 3)
-        self.assertEqual(tokens[0].type, 'NUMBER')
-        self.assertEqual(tokens[0].value, Rational(1))
-        self.assertEqual(tokens[1].type, 'OPERATOR')
-        self.assertEqual(tokens[1].value, '+')
-        self.assertEqual(tokens[2].type, 'NUMBER')
-        self.assertEqual(tokens[2].value, Rational(2))
+        self.assertEqual(tokens, list(self._INFIX_1_PLUS_2))
     
     def test_tokenize_fractions(self):
         """测试分数词法分析"""
         tokens = self.parser.tokenize("1/2+3/4")
-        self.assertEqual(len(tokens), 3)  # 1/2, +, 3/4
-        self.assertEqual(tokens[0].value, Rational(1, 2))
-        self.assertEqual(tokens[1].value, '+')
-        self.assertEqual(tokens[2].value, Rational(3, 4))
+        self.assertEqual(tokens, [
+            Token('NUMBER', Rational(1, 2)),
+            Token('OPERATOR', '+'),
+            Token('NUMBER', Rational(3, 4))
+        ])
     
     def test_tokenize_negative_numbers(self):
         """测试负数词法分析"""
         tokens = self.parser.tokenize("-1+2")
-        self.assertEqual(len(tokens), 3)
-        self.assertEqual(tokens[0].value, Rational(-1))
-        self.assertEqual(tokens[2].value, Rational(2))
+        self.assertEqual(tokens, [
+            Token('NUMBER', Rational(-1)),
+            Token('OPERATOR', '+'),
+            Token('NUMBER', Rational(2))
+        ])
     
     def test_tokenize_with_parentheses(self):
         """测试带括号的词法分析"""
         tokens = self.parser.tokenize("(1+2)*3")
-        self.assertEqual(len(tokens), 7)
-        self.assertEqual(tokens[0].type, 'PARENTHESIS')
-        self.assertEqual(tokens[0].value, '(')
-        self.assertEqual(tokens[4].type, 'PARENTHESIS')
-        self.assertEqual(tokens[4].value, ')')
+        self.assertEqual(tokens, [
+            Token('PARENTHESIS', '('),
+            Token('NUMBER', Rational(1)),
+            Token('OPERATOR', '+'),
+            Token('NUMBER', Rational(2)),
+            Token('PARENTHESIS', ')'),
+            Token('OPERATOR', '*'),
+            Token('NUMBER', Rational(3))
+        ])
+    
+    def test_tokenize_raw(self):
+        """测试保留数字原始文本的词法分析"""
+        self.assertEqual(self.parser.tokenize_raw("-3/5 * (6/2 + 1)"), [
+            Token('NUMBER', '-3/5'),
+            Token('OPERATOR', '*'),
+            Token('PARENTHESIS', '('),
+            Token('NUMBER', '6/2'),
+            Token('OPERATOR', '+'),
+            Token('NUMBER', '1'),
+            Token('PARENTHESIS', ')')
+        ])
+        
+        # 格式错误与 tokenize 一样抛出 ValueError
+        for expression in ("1/", "/2", "1+a"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    self.parser.tokenize_raw(expression)
     
     def test_invalid_characters(self):
         """测试无效字符"""
@@ -81,16 +124,10 @@ class TestExpressionParser(unittest.TestCase):
     
     def test_infix_to_postfix_basic(self):
         """测试基本中缀转后缀"""
-        tokens = [
-            Token('NUMBER', Rational(1)),
-            Token('OPERATOR', '+'),
-            Token('NUMBER', Rational(2))
-        ]
-        postfix = self.parser.infix_to_postfix(tokens)
+        postfix = self.parser.infix_to_postfix(self._INFIX_1_PLUS_2)
         
-        expected_types = ['NUMBER', 'NUMBER', 'OPERATOR']
-        actual_types = [token.type for token in postfix]
-        self.assertEqual(actual_types, expected_types)
+        # 应该是 1 2 + 的顺序
+        self.assertEqual(postfix, list(self._POSTFIX_1_PLUS_2))
     
     def test_infix_to_postfix_precedence(self):
         """测试运算符优先级"""
@@ -104,9 +141,13 @@ class TestExpressionParser(unittest.TestCase):
         postfix = self.parser.infix_to_postfix(tokens)
         
         # 应该是 1 2 3 * + 的顺序
-        expected_values = [Rational(1), Rational(2), Rational(3), '*', '+']
-        actual_values = [token.value for token in postfix]
-        self.assertEqual(actual_values, expected_values)
+        self.assertEqual(postfix, [
+            Token('NUMBER', Rational(1)),
+            Token('NUMBER', Rational(2)),
+            Token('NUMBER', Rational(3)),
+            Token('OPERATOR', '*'),
+            Token('OPERATOR', '+')
+        ])
     
     def test_infix_to_postfix_parentheses(self):
         """测试括号优先级"""
@@ -122,30 +163,22 @@ class TestExpressionParser(unittest.TestCase):
         postfix = self.parser.infix_to_postfix(tokens)
         
         # 应该是 1 2 + 3 * 的顺序
-        expected_values = [Rational(1), Rational(2), '+', Rational(3), '*']
-        actual_values = [token.value for token in postfix]
-        self.assertEqual(actual_values, expected_values)
+        self.assertEqual(postfix, [
+            Token('NUMBER', Rational(1)),
+            Token('NUMBER', Rational(2)),
+            Token('OPERATOR', '+'),
+            Token('NUMBER', Rational(3)),
+            Token('OPERATOR', '*')
+        ])
     
     def test_mismatched_parentheses(self):
         """测试括号不匹配"""
-        tokens = [
-            Token('PARENTHESIS', '('),
-            Token('NUMBER', Rational(1)),
-            Token('OPERATOR', '+'),
-            Token('NUMBER', Rational(2))
-        ]
-        
         with self.assertRaises(ValueError):
-            self.parser.infix_to_postfix(tokens)
+            self.parser.infix_to_postfix(self._INFIX_UNCLOSED_PARENTHESIS)
     
     def test_evaluate_postfix_basic(self):
         """测试基本后缀表达式计算"""
-        tokens = [
-            Token('NUMBER', Rational(1)),
-            Token('NUMBER', Rational(2)),
-            Token('OPERATOR', '+')
-        ]
-        result = self.parser.evaluate_postfix(tokens)
+        result = self.parser.evaluate_postfix(self._POSTFIX_1_PLUS_2)
         self.assertEqual(result, Rational(3))
     
     def test_evaluate_postfix_fractions(self):
@@ -170,113 +203,111 @@ class TestExpressionParser(unittest.TestCase):
     
     def test_evaluate_postfix_division_by_zero(self):
         """测试除零异常"""
-        tokens = [
-            Token('NUMBER', Rational(1)),
-            Token('NUMBER', Rational(0)),
-            Token('OPERATOR', '/')
-        ]
-        
         with self.assertRaises(ZeroDivisionError):
-            self.parser.evaluate_postfix(tokens)
+            self.parser.evaluate_postfix(self._POSTFIX_DIVISION_BY_ZERO)
     
     def test_evaluate_postfix_insufficient_operands(self):
         """测试操作数不足"""
-        tokens = [
-            Token('NUMBER', Rational(1)),
-            Token('OPERATOR', '+')
-        ]
-        
         with self.assertRaises(ValueError):
-            self.parser.evaluate_postfix(tokens)
+            self.parser.evaluate_postfix(self._POSTFIX_MISSING_OPERAND)
     
-    def test_parse_simple_expressions(self):
-        """测试简单表达式解析"""
+    # 解析测试数据：(表达式, 期望结果)，按测试类别分组
+    _SIMPLE = (
         # 基本运算
-        self.assertEqual(self.parser.parse("1+2"), Rational(3))
-        self.assertEqual(self.parser.parse("3-1"), Rational(2))
-        self.assertEqual(self.parser.parse("2*3"), Rational(6))
-        self.assertEqual(self.parser.parse("6/2"), Rational(3))
-    
-    def test_parse_fraction_expressions(self):
-        """测试分数表达式解析"""
+        ("1+2", Rational(3)),
+        ("3-1", Rational(2)),
+        ("2*3", Rational(6)),
+        ("6/2", Rational(3)),
+    )
+    _FRACTIONS = (
         # 分数运算
-        self.assertEqual(self.parser.parse("1/2+1/3"), Rational(5, 6))
-        self.assertEqual(self.parser.parse("1/2-1/3"), Rational(1, 6))
-        self.assertEqual(self.parser.parse("1/2*2/3"), Rational(1, 3))
-        self.assertEqual(self.parser.parse("1/2/1/3"), Rational(3, 2))
-    
-    def test_parse_precedence(self):
-        """测试运算符优先级"""
+        ("1/2+1/3", Rational(5, 6)),
+        ("1/2-1/3", Rational(1, 6)),
+        ("1/2*2/3", Rational(1, 3)),
+        ("1/2/1/3", Rational(3, 2)),
+    )
+    _PRECEDENCE = (
         # 乘法优先级高于加法
-        self.assertEqual(self.parser.parse("1+2*3"), Rational(7))
-        self.assertEqual(self.parser.parse("2*3+1"), Rational(7))
-        
+        ("1+2*3", Rational(7)),
+        ("2*3+1", Rational(7)),
         # 除法优先级高于减法
-        self.assertEqual(self.parser.parse("6-6/2"), Rational(3))
-        self.assertEqual(self.parser.parse("6/2-1"), Rational(2))
-    
-    def test_parse_parentheses(self):
-        """测试括号优先级"""
+        ("6-6/2", Rational(3)),
+        ("6/2-1", Rational(2)),
+    )
+    _PARENTHESES = (
         # 括号改变优先级
-        self.assertEqual(self.parser.parse("(1+2)*3"), Rational(9))
-        self.assertEqual(self.parser.parse("1*(2+3)"), Rational(5))
-        self.assertEqual(self.parser.parse("(6-3)/3"), Rational(1))
-    
-    def test_parse_complex_expressions(self):
-        """测试复杂表达式"""
-        # 复杂表达式
-        self.assertEqual(self.parser.parse("1+2*3-4"), Rational(3))
-        self.assertEqual(self.parser.parse("(1+2)*(3-1)"), Rational(6))
-        self.assertEqual(self.parser.parse("1/2+1/3-1/6"), Rational(2, 3))
-        self.assertEqual(self.parser.parse("(1/2+1/3)*2"), Rational(5, 3))
-    
-    def test_parse_negative_numbers(self):
-        """测试负数表达式"""
-        self.assertEqual(self.parser.parse("-1+2"), Rational(1))
-        self.assertEqual(self.parser.parse("1+-2"), Rational(-1))
-        self.assertEqual(self.parser.parse("-1*-2"), Rational(2))
-        self.assertEqual(self.parser.parse("(-1+2)*3"), Rational(3))
-    
-    def test_parse_edge_cases(self):
-        """测试边界情况"""
+        ("(1+2)*3", Rational(9)),
+        ("1*(2+3)", Rational(5)),
+        ("(6-3)/3", Rational(1)),
+    )
+    _COMPLEX = (
+        ("1+2*3-4", Rational(3)),
+        ("(1+2)*(3-1)", Rational(6)),
+        ("1/2+1/3-1/6", Rational(2, 3)),
+        ("(1/2+1/3)*2", Rational(5, 3)),
+    )
+    _NEGATIVE = (
+        ("-1+2", Rational(1)),
+        ("1+-2", Rational(-1)),
+        ("-1*-2", Rational(2)),
+        ("(-1+2)*3", Rational(3)),
+    )
+    _EDGE_CASES = (
         # 单个数字
-        self.assertEqual(self.parser.parse("5"), Rational(5))
-        self.assertEqual(self.parser.parse("1/2"), Rational(1, 2))
-        
+        ("5", Rational(5)),
+        ("1/2", Rational(1, 2)),
         # 嵌套括号
-        self.assertEqual(self.parser.parse("((1+2)*3)"), Rational(9))
-        self.assertEqual(self.parser.parse("(1+(2*3))"), Rational(7))
-    
-    def test_parse_invalid_expressions(self):
-        """测试无效表达式"""
+        ("((1+2)*3)", Rational(9)),
+        ("(1+(2*3))", Rational(7)),
+    )
+    _INVALID = (
         # 空表达式
-        with self.assertRaises(ValueError):
-            self.parser.parse("")
-        
-        with self.assertRaises(ValueError):
-            self.parser.parse("   ")
-        
+        "",
+        "   ",
         # 括号不匹配
-        with self.assertRaises(ValueError):
-            self.parser.parse("(1+2")
-        
-        with self.assertRaises(ValueError):
-            self.parser.parse("1+2)")
-        
+        "(1+2",
+        "1+2)",
         # 无效字符
-        with self.assertRaises(ValueError):
-            self.parser.parse("1+a")
-        
+        "1+a",
         # 除零（在词法分析阶段就会被捕获）
-        with self.assertRaises(ValueError):
-            self.parser.parse("1/0")
-        
+        "1/0",
         # 操作符错误
-        with self.assertRaises(ValueError):
-            self.parser.parse("1++2")
+        "1++2",
+        "1+",
+    )
+    
+    def test_parse_expressions(self):
+        """测试表达式解析：简单、分数、优先级、括号、复杂、负数及边界情况"""
+        groups = {
+            "simple": self._SIMPLE,
+            "fractions": self._FRACTIONS,
+            "precedence": self._PRECEDENCE,
+            "parentheses": self._PARENTHESES,
+            "complex": self._COMPLEX,
+            "negative": self._NEGATIVE,
+            "edge_cases": self._EDGE_CASES,
+        }
         
+        for group, cases in groups.items():
+            for expression, expected in cases:
+                with self.subTest(group=group, expression=expression):
+                    self.assertEqual(self.parser.parse(expression), expected)
+    
+    def test_parse_invalid_expressions(self):
+        """测试无效表达式"""
+        for expression in self._INVALID:
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    self.parser.parse(expression)
+    
+    def test_try_parse(self):
+        """测试除零时返回 None 的解析"""
+        self.assertEqual(self.parser.try_parse("1/2 + 1/3"), Rational(5, 6))
+        self.assertIsNone(self.parser.try_parse("(1 + 1) / (2 - 2)"))
+        
+        # 格式错误仍抛出异常
         with self.assertRaises(ValueError):
-            self.parser.parse("1+")
+            self.parser.try_parse("(1+2")
     
     def test_evaluate_expression_function(self):
         """测试便捷函数"""
@@ -288,10 +319,13 @@ class TestExpressionParser(unittest.TestCase):
 class TestExpressionParserIntegration(unittest.TestCase):
     """表达式解析器集成测试"""
     
+    @classmethod
+    def setUpClass(cls):
+        """测试前准备"""
+        cls.parser = ExpressionParser()
+    
     def test_complex_mathematical_expressions(self):
         """测试复杂数学表达式"""
-        parser = ExpressionParser()
-        
         # 测试用例：小学数学常见表达式
         test_cases = [
             ("1+2+3", Rational(6)),
@@ -308,19 +342,102 @@ class TestExpressionParserIntegration(unittest.TestCase):
         
         for expression, expected in test_cases:
             with self.subTest(expression=expression):
-                result = parser.parse(expression)
+                result = self.parser.parse(expression)
                 self.assertEqual(result, expected, 
                                f"表达式 {expression} 计算结果错误")
     
     def test_expression_with_spaces(self):
         """测试带空格的表达式"""
-        parser = ExpressionParser()
-        
         # 应该能正确处理空格
-        self.assertEqual(parser.parse("1 + 2"), Rational(3))
-        self.assertEqual(parser.parse(" 1 + 2 "), Rational(3))
-        self.assertEqual(parser.parse("1 + 2 * 3"), Rational(7))
-        self.assertEqual(parser.parse("( 1 + 2 ) * 3"), Rational(9))
+        self.assertEqual(self.parser.parse("1 + 2"), Rational(3))
+        self.assertEqual(self.parser.parse(" 1 + 2 "), Rational(3))
+        self.assertEqual(self.parser.parse("1 + 2 * 3"), Rational(7))
+        self.assertEqual(self.parser.parse("( 1 + 2 ) * 3"), Rational(9))
+
+
+class TestDeduplicatorCanonicalForm(unittest.TestCase):
+    """去重器规范形式测试"""
+    
+    # (表达式, 规范字符串)：交换律运算符的操作数按文本字典序排列，叶子与 Rational.to_string 格式一致
+    _CANONICAL = (
+        ("1 + 2", "(1+2)"),
+        ("2 + 1", "(1+2)"),
+        ("3 * 4 + 1/2", "((3*4)+1/2)"),
+        ("1/2 * 3 + 4", "((1/2*3)+4)"),
+        ("(9 / 5) + 7/8", "(1'4/5+7/8)"),
+        ("6/4 - 2", "(1'1/2-2)"),
+        ("2 - 1", "(2-1)"),
+        ("(1 + 2) * (2 + 1)", "((1+2)*(1+2))"),
+        ("3", "3"),
+    )
+    
+    def test_canonicalize_expression(self):
+        """测试规范字符串"""
+        deduplicator = Deduplicator()
+        for expression, expected in self._CANONICAL:
+            with self.subTest(expression=expression):
+                self.assertEqual(deduplicator.canonicalize_expression(expression), expected)
+    
+    def test_canonicalize_associative(self):
+        """测试结合律去重时的多元节点规范字符串"""
+        deduplicator = Deduplicator(associative=True)
+        self.assertEqual(deduplicator.canonicalize_expression("3 + (2 + 1)"), "(1+2+3)")
+        self.assertEqual(deduplicator.canonicalize_expression("(1 + 2) + 3"), "(1+2+3)")
+        self.assertEqual(deduplicator.canonicalize_expression("2 * 3 + 1"), "((2*3)+1)")
+    
+    def test_canonical_key_equivalence(self):
+        """测试只交换+和×的操作数得到相同的结构键，结合律变体仅在开启后相同"""
+        # (左表达式, 右表达式, 默认是否相同, 开启结合律后是否相同)
+        cases = (
+            ("1 + 2", "2 + 1", True, True),
+            ("1/2 * 3", "3 * 2/4", True, True),
+            ("(1 + 2) * 3", "3 * (2 + 1)", True, True),
+            ("(1 + 2) + 3", "1 + (2 + 3)", False, True),
+            ("1 + 2 + 3", "3 + 2 + 1", False, True),
+            ("2 - 1", "1 - 2", False, False),
+            ("1 / (2/3)", "(1/2) / 3", False, False),
+            ("1 + 2 * 3", "(1 + 2) * 3", False, False),
+        )
+        for associative in (False, True):
+            deduplicator = Deduplicator(associative=associative)
+            for left, right, same, same_associative in cases:
+                with self.subTest(left=left, right=right, associative=associative):
+                    expected = same_associative if associative else same
+                    self.assertEqual(deduplicator.canonical_key(left) ==
+                                     deduplicator.canonical_key(right), expected)
+    
+    def test_number_key(self):
+        """测试数字原始文本约分为与 Rational.to_string 一致的键"""
+        cases = (
+            ("3", "3"),
+            ("007", "7"),
+            ("-3", "-3"),
+            ("6/2", "3"),
+            ("2/4", "1/2"),
+            ("9/5", "1'4/5"),
+            ("-9/5", "-1'4/5"),
+            ("0/7", "0"),
+        )
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(Deduplicator._number_key(text), expected)
+        
+        with self.assertRaises(ValueError):
+            Deduplicator._number_key("1/0")
+    
+    def test_deep_nesting(self):
+        """测试深层括号嵌套不受递归层数限制"""
+        depth = sys.getrecursionlimit() * 2
+        expression = "(" * depth + "1 + 2" + ")" * depth
+        self.assertEqual(Deduplicator().canonicalize_expression(expression), "(1+2)")
+    
+    def test_invalid_expressions(self):
+        """测试无法解析的表达式退回去除空格后的原始文本"""
+        deduplicator = Deduplicator()
+        for expression in ("1 +", "(1 + 2", "1 + 2)", "()", "1 2", "1 + a"):
+            with self.subTest(expression=expression):
+                self.assertEqual(deduplicator.canonicalize_expression(expression),
+                                 expression.replace(' ', ''))
 
 
 if __name__ == '__main__':
@@ -5,44 +5,81 @@
 """
 
 import unittest
+import math
+import random
 import sys
 import os
+from fractions import Fraction
+from operator import add, sub, mul, truediv
 
 # 添加src目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from rational import Rational, create_rational
 
+# 多个测试共用的操作数（Rational 不可变，可安全共享）
+_THREE_FIFTHS = Rational(3, 5)
+_ONE_HALF = Rational(1, 2)
+_ONE_THIRD = Rational(1, 3)
+
 
 class TestRational(unittest.TestCase):
     """有理数类测试"""
     
+    # 测试数据，按测试类别分组
+    _INITIALIZATION = (
+        # (分子, 分母, 期望分子, 期望分母)
+        (3, 1, 3, 1),     # 自然数
+        (3, 5, 3, 5),     # 真分数
+        (7, 5, 7, 5),     # 带分数（假分数）
+        (-3, 5, -3, 5),   # 负数
+        (3, -5, -3, 5),   # 分母为负数
+    )
+    _SIMPLIFICATION = (
+        (6, 8, 3, 4),     # 自动约分
+        (0, 5, 0, 1),     # 分子为0
+        (-6, 8, -3, 4),   # 负数约分
+    )
+    _FROM_STRING = (
+        # (字符串, 期望分子, 期望分母)
+        ("3", 3, 1),          # 自然数
+        ("3/5", 3, 5),        # 真分数
+        ("1'3/5", 8, 5),      # 带分数：1*5 + 3 = 8
+        ("-1'3/5", -8, 5),    # 负数带分数
+    )
+    _INVALID_STRINGS = ("1'3", "1/2/3")
+    _TO_STRING = (
+        # (分子, 分母, 期望字符串)
+        (3, 1, "3"),          # 自然数
+        (3, 5, "3/5"),        # 真分数
+        (8, 5, "1'3/5"),      # 带分数
+        (-3, 5, "-3/5"),      # 负数
+        (-8, 5, "-1'3/5"),    # 负数带分数
+        (0, 1, "0"),          # 零
+    )
+    _ARITHMETIC = (
+        # (运算, 期望分子, 期望分母)，操作数为 3/5 与 1/3
+        (add, 14, 15),        # 3*3 + 1*5 = 14, 5*3 = 15
+        (sub, 4, 15),         # 3*3 - 1*5 = 4
+        (mul, 1, 5),          # 3/15 约分后为 1/5
+        (truediv, 9, 5),      # 3*3 = 9, 5*1 = 5
+    )
+    
     def test_initialization(self):
         """测试初始化"""
-        # 测试自然数
-        r1 = Rational(3)
-        self.assertEqual(r1.numerator, 3)
-        self.assertEqual(r1.denominator, 1)
-        
-        # 测试真分数
-        r2 = Rational(3, 5)
-        self.assertEqual(r2.numerator, 3)
-        self.assertEqual(r2.denominator, 5)
-        
-        # 测试带分数（假分数）
-        r3 = Rational(7, 5)
-        self.assertEqual(r3.numerator, 7)
-        self.assertEqual(r3.denominator, 5)
-        
-        # 测试负数
-        r4 = Rational(-3, 5)
-        self.assertEqual(r4.numerator, -3)
-        self.assertEqual(r4.denominator, 5)
-        
-        # 测试分母为负数
-        r5 = Rational(3, -5)
-        self.assertEqual(r5.numerator, -3)
-        self.assertEqual(r5.denominator, 5)
+        for numerator, denominator, expected_num, expected_den in self._INITIALIZATION:
+            with self.subTest(numerator=numerator, denominator=denominator):
+                r = Rational(numerator, denominator)
+                self.assertEqual((r.numerator, r.denominator), (expected_num, expected_den))
+    
+    def test_shared_small_values(self):
+        """测试小整数与小分数返回已约分的共享实例"""
+        self.assertIs(Rational(6, 8), Rational(3, 4))
+        self.assertIs(Rational(4, 2), Rational(2))
+        self.assertIs(Rational(0, 5), Rational(0))
+        
+        r = Rational(-6, 8)
+        self.assertEqual((r.numerator, r.denominator), (-3, 4))
     
     def test_zero_denominator(self):
         """测试分母为0的异常"""
@@ -51,104 +88,44 @@ class TestRational(unittest.TestCase):
     
     def test_simplification(self):
         """测试约分功能"""
-        # 测试自动约分
-        r1 = Rational(6, 8)
-        self.assertEqual(r1.numerator, 3)
-        self.assertEqual(r1.denominator, 4)
-        
-        # 测试分子为0
-        r2 = Rational(0, 5)
-        self.assertEqual(r2.numerator, 0)
-        self.assertEqual(r2.denominator, 1)
-        
-        # 测试负数约分
-        r3 = Rational(-6, 8)
-        self.assertEqual(r3.numerator, -3)
-        self.assertEqual(r3.denominator, 4)
+        for numerator, denominator, expected_num, expected_den in self._SIMPLIFICATION:
+            with self.subTest(numerator=numerator, denominator=denominator):
+                r = Rational(numerator, denominator)
+                self.assertEqual((r.numerator, r.denominator), (expected_num, expected_den))
     
     def test_from_string(self):
         """测试从字符串创建"""
-        # 测试自然数
-        r1 = Rational.from_string("3")
-        self.assertEqual(r1.numerator, 3)
-        self.assertEqual(r1.denominator, 1)
-        
-        # 测试真分数
-        r2 = Rational.from_string("3/5")
-        self.assertEqual(r2.numerator, 3)
-        self.assertEqual(r2.denominator, 5)
-        
-        # 测试带分数
-        r3 = Rational.from_string("1'3/5")
-        self.assertEqual(r3.numerator, 8)  # 1*5 + 3 = 8
-        self.assertEqual(r3.denominator, 5)
-        
-        # 测试负数带分数
-        r4 = Rational.from_string("-1'3/5")
-        self.assertEqual(r4.numerator, -8)
-        self.assertEqual(r4.denominator, 5)
+        for text, expected_num, expected_den in self._FROM_STRING:
+            with self.subTest(text=text):
+                r = Rational.from_string(text)
+                self.assertEqual((r.numerator, r.denominator), (expected_num, expected_den))
         
         # 测试无效格式
-        with self.assertRaises(ValueError):
-            Rational.from_string("1'3")
-        
-        with self.assertRaises(ValueError):
-            Rational.from_string("1/2/3")
+        for text in self._INVALID_STRINGS:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    Rational.from_string(text)
     
     def test_to_string(self):
         """测试字符串格式化"""
-        # 测试自然数
-        r1 = Rational(3)
-        self.assertEqual(r1.to_string(), "3")
-        
-        # 测试真分数
-        r2 = Rational(3, 5)
-        self.assertEqual(r2.to_string(), "3/5")
-        
-        # 测试带分数
-        r3 = Rational(8, 5)
-        self.assertEqual(r3.to_string(), "1'3/5")
-        
-        # 测试负数
-        r4 = Rational(-3, 5)
-        self.assertEqual(r4.to_string(), "-3/5")
-        
-        # 测试负数带分数
-        r5 = Rational(-8, 5)
-        self.assertEqual(r5.to_string(), "-1'3/5")
-        
-        # 测试零
-        r6 = Rational(0)
-        self.assertEqual(r6.to_string(), "0")
+        for numerator, denominator, expected in self._TO_STRING:
+            with self.subTest(numerator=numerator, denominator=denominator):
+                self.assertEqual(Rational(numerator, denominator).to_string(), expected)
     
     def test_arithmetic_operations(self):
         """测试算术运算"""
-        r1 = Rational(3, 5)  # 3/5
-        r2 = Rational(1, 3)  # 1/3
-        
-        # 测试加法
-        result = r1 + r2
-        self.assertEqual(result.numerator, 14)  # 3*3 + 1*5 = 14
-        self.assertEqual(result.denominator, 15)  # 5*3 = 15
-        
-        # 测试减法
-        result = r1 - r2
-        self.assertEqual(result.numerator, 4)  # 3*3 - 1*5 = 4
-        self.assertEqual(result.denominator, 15)
-        
-        # 测试乘法
-        result = r1 * r2
-        self.assertEqual(result.numerator, 1)  # 3*1 = 3, 约分后为1
-        self.assertEqual(result.denominator, 5)  # 5*3 = 15, 约分后为5
-        
-        # 测试除法
-        result = r1 / r2
-        self.assertEqual(result.numerator, 9)  # 3*3 = 9
-        self.assertEqual(result.denominator, 5)  # 5*1 = 5
+        r1 = _THREE_FIFTHS
+        r2 = _ONE_THIRD
+        
+        for operation, expected_num, expected_den in self._ARITHMETIC:
+            with self.subTest(operation=operation.__name__):
+                result = operation(r1, r2)
+                self.assertEqual((result.numerator, result.denominator),
+                                 (expected_num, expected_den))
     
     def test_arithmetic_with_integers(self):
         """测试与整数的运算"""
-        r1 = Rational(3, 5)
+        r1 = _THREE_FIFTHS
         
         # 测试与整数相加
         result = r1 + 2
@@ -162,16 +139,24 @@ class TestRational(unittest.TestCase):
     
     def test_division_by_zero(self):
         """测试除零异常"""
-        r1 = Rational(3, 5)
+        r1 = _THREE_FIFTHS
         r2 = Rational(0)
         
         with self.assertRaises(ZeroDivisionError):
             r1 / r2
     
+    def test_try_div(self):
+        """测试不抛出异常的除法"""
+        r1 = _THREE_FIFTHS
+        
+        self.assertEqual(r1.try_div(Rational(1, 2)), Rational(6, 5))
+        self.assertEqual(r1.try_div(3), Rational(1, 5))
+        self.assertIsNone(r1.try_div(Rational(0)))
+    
     def test_comparison_operations(self):
         """测试比较运算"""
-        r1 = Rational(3, 5)  # 0.6
-        r2 = Rational(1, 2)  # 0.5
+        r1 = _THREE_FIFTHS  # 0.6
+        r2 = _ONE_HALF  # 0.5
         r3 = Rational(6, 10)  # 0.6
         
         # 测试相等
@@ -198,7 +183,7 @@ class TestRational(unittest.TestCase):
     
     def test_unary_operations(self):
         """测试一元运算"""
-        r1 = Rational(3, 5)
+        r1 = _THREE_FIFTHS
         
         # 测试取负
         neg_r1 = -r1
@@ -218,47 +203,28 @@ class TestRational(unittest.TestCase):
     
     def test_type_checking(self):
         """测试类型判断"""
-        # 测试正数
-        r1 = Rational(3, 5)
-        self.assertTrue(r1.is_positive())
-        self.assertFalse(r1.is_negative())
-        self.assertFalse(r1.is_zero())
-        
-        # 测试负数
-        r2 = Rational(-3, 5)
-        self.assertFalse(r2.is_positive())
-        self.assertTrue(r2.is_negative())
-        self.assertFalse(r2.is_zero())
-        
-        # 测试零
-        r3 = Rational(0)
-        self.assertFalse(r3.is_positive())
-        self.assertFalse(r3.is_negative())
-        self.assertTrue(r3.is_zero())
-        
-        # 测试整数
-        r4 = Rational(3)
-        self.assertTrue(r4.is_integer())
-        
-        r5 = Rational(3, 5)
-        self.assertFalse(r5.is_integer())
-        
-        # 测试真分数
-        r6 = Rational(3, 5)
-        self.assertTrue(r6.is_proper_fraction())
-        self.assertFalse(r6.is_improper_fraction())
-        
-        # 测试假分数
-        r7 = Rational(7, 5)
-        self.assertFalse(r7.is_proper_fraction())
-        self.assertTrue(r7.is_improper_fraction())
+        # (分子, 分母, (正数, 负数, 零, 整数, 真分数, 假分数))
+        cases = (
+            (3, 5, (True, False, False, False, True, False)),      # 正真分数
+            (-3, 5, (False, True, False, False, True, False)),     # 负真分数
+            (0, 1, (False, False, True, True, False, False)),      # 零
+            (3, 1, (True, False, False, True, False, False)),      # 整数
+            (7, 5, (True, False, False, False, False, True)),      # 假分数
+        )
+        
+        for numerator, denominator, expected in cases:
+            with self.subTest(numerator=numerator, denominator=denominator):
+                r = Rational(numerator, denominator)
+                self.assertEqual((r.is_positive(), r.is_negative(), r.is_zero(),
+                                  r.is_integer(), r.is_proper_fraction(),
+                                  r.is_improper_fraction()), expected)
     
     def test_conversion_methods(self):
         """测试转换方法"""
-        r1 = Rational(3, 5)
+        r1 = _THREE_FIFTHS
         
         # 测试转换为浮点数
-        self.assertAlmostEqual(r1.to_float(), 0.6, places=10)
+        self.assertTrue(math.isclose(r1.to_float(), 0.6, rel_tol=1e-12))
         
         # 测试求倒数
         reciprocal = r1.reciprocal()
@@ -287,6 +253,23 @@ class TestRational(unittest.TestCase):
         self.assertEqual(r3.numerator, 0)
         self.assertEqual(r3.denominator, 1)
     
+    def test_random_invariants(self):
+        """测试随机分子分母的不变量：最简形式、分母为正、与 Fraction 等值、字符串往返"""
+        rng = random.Random(20240101)  # 固定种子，失败可复现
+        
+        for _ in range(2000):
+            # 小范围覆盖零、共享的小整数实例和频繁约分，大范围覆盖大数
+            bound = rng.choice([20, 10**9])
+            numerator = rng.randint(-bound, bound)
+            denominator = rng.choice([-1, 1]) * rng.randint(1, bound)
+            with self.subTest(numerator=numerator, denominator=denominator):
+                r = Rational(numerator, denominator)
+                self.assertGreater(r.denominator, 0)
+                self.assertEqual(math.gcd(r.numerator, r.denominator), 1)
+                self.assertEqual(Fraction(r.numerator, r.denominator),
+                                 Fraction(numerator, denominator))
+                self.assertEqual(Rational.from_string(r.to_string()), r)
+    
     def test_create_rational_function(self):
         """测试便捷创建函数"""
         # 测试整数
@@ -310,13 +293,23 @@ class TestRational(unittest.TestCase):
     
     def test_string_representation(self):
         """测试字符串表示"""
-        r1 = Rational(3, 5)
+        r1 = _THREE_FIFTHS
         
         # 测试__str__
         self.assertEqual(str(r1), "3/5")
         
         # 测试__repr__
         self.assertEqual(repr(r1), "Rational(3, 5)")
+    
+    def test_hash(self):
+        """测试哈希"""
+        # 与整数和 Fraction 的哈希一致
+        self.assertEqual(hash(Rational(3)), hash(3))
+        self.assertEqual(hash(Rational(-3, 5)), hash(Fraction(-3, 5)))
+        self.assertEqual(hash(Rational(6, 8)), hash(Rational(3, 4)))
+        
+        # 可用作集合元素
+        self.assertEqual(len({Rational(1, 2), Rational(2, 4), Rational(1, 3)}), 2)
 
 
 class TestRationalIntegration(unittest.TestCase):
@@ -325,8 +318,8 @@ class TestRationalIntegration(unittest.TestCase):
     def test_complex_calculations(self):
         """测试复杂计算"""
         # 测试复杂表达式：1/2 + 1/3 - 1/6
-        r1 = Rational(1, 2)
-        r2 = Rational(1, 3)
+        r1 = _ONE_HALF
+        r2 = _ONE_THIRD
         r3 = Rational(1, 6)
         
         result = r1 + r2 - r3
@@ -349,8 +342,8 @@ class TestRationalIntegration(unittest.TestCase):
     def test_chain_operations(self):
         """测试链式运算"""
         # 测试：((1/2 + 1/3) * 2) / (1/4)
-        r1 = Rational(1, 2)
-        r2 = Rational(1, 3)
+        r1 = _ONE_HALF
+        r2 = _ONE_THIRD
         r3 = Rational(2)
         r4 = Rational(1, 4)
         
@@ -358,6 +351,15 @@ class TestRationalIntegration(unittest.TestCase):
         self.assertEqual(result.numerator, 20)  # (5/6 * 2) / (1/4) = (10/6) / (1/4) = 40/6 = 20/3
         self.assertEqual(result.denominator, 3)
 
+    
+    def test_harmonic_sum(self):
+        """测试长链加法（调和级数前999项）：每步约分，结果与 Fraction 一致"""
+        result = sum((Rational(1, i) for i in range(1, 1000)), Rational(0))
+        expected = sum((Fraction(1, i) for i in range(1, 1000)), Fraction(0))
+        
+        self.assertEqual((result.numerator, result.denominator),
+                         (expected.numerator, expected.denominator))
+
 
 if __name__ == '__main__':
     # 运行测试